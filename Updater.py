@@ -1,10 +1,15 @@
+import startup_profile
 import sys
 import os
 import json
-import requests
 import subprocess
-import shutil
-import winreg  # Per avvio automatico su Windows
+
+import http_client
+from downloads import download_file, discard_partial, PART_SUFFIX, JOURNAL_SUFFIX
+from atomic_files import hash_file, sync_file
+from app_paths import SETTINGS_FILE, METADATA_CACHE_FILE
+from metadata_cache import MetadataCache
+from settings_store import SettingsStore
 
 # Definisce la cartella di destinazione in LOCALAPPDATA per l’updater stabile
 SETTINGS_FOLDER = os.path.join(os.getenv('LOCALAPPDATA'), "InstallerTraduzioneMRREVO")
@@ -13,103 +18,234 @@ if not os.path.exists(SETTINGS_FOLDER):
 
 # URL del file remoto contenente le info di aggiornamento
 LAUNCHER_UPDATE_INFO_URL = "https://www.mrrevo.it/s/LrEJSBT9dWbRLYJ/download/launcher_info.txt"
-# Versione corrente, usata come fallback (in caso non si riesca a leggere il JSON)
-CURRENT_INSTALLER_VERSION = "0"
+# Per quanto tempo launcher_info.txt in cache vale senza ricontrollarlo (secondi)
+UPDATE_INFO_TTL = 60 * 60
 
-def get_installed_installer_version():
+def get_installed_installer_version(settings):
     """
-    Legge il file JSON "installer_version.json" nella cartella SETTINGS_FOLDER
-    e restituisce il numero di versione installato. Se non esiste, restituisce "0".
+    Restituisce la versione dell'installer scaricata, salvata in settings.json
+    (vedi settings_store.py, che importa il vecchio installer_version.json).
+    Se non è mai stata salvata, restituisce "0".
     """
-    json_path = os.path.join(SETTINGS_FOLDER, "installer_version.json")
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            version = data.get("version", "0")
-            print(f"DEBUG: Installed installer version (JSON): {version}")
-            return version
-        except Exception as e:
-            print("DEBUG: Errore leggendo il file JSON della versione:", e)
-            return "0"
-    else:
-        print("DEBUG: Nessun file JSON trovato, assumo versione '0'.")
-        return "0"
+    version = settings.get("installer_version", "0")
+    print(f"DEBUG: Installed installer version: {version}")
+    return version
 
-def save_installed_installer_version(version):
+def save_installed_installer_version(settings, version, sha256=None, size=None):
     """
-    Salva la versione installata in un file JSON nella cartella SETTINGS_FOLDER.
+    Salva in settings.json, subito, la versione installata con hash e
+    dimensione del suo installer (per verificarlo ai prossimi avvii anche
+    senza rete): l'installer avviato subito dopo legge lo stesso file.
     """
-    json_path = os.path.join(SETTINGS_FOLDER, "installer_version.json")
-    try:
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump({"version": version}, f, ensure_ascii=False, indent=4)
-        print(f"DEBUG: Aggiornata versione nel JSON a: {version}")
-    except Exception as e:
-        print("DEBUG: Errore salvando il file JSON della versione:", e)
+    settings.update({"installer_version": version, "installer_sha256": sha256, "installer_size": size})
+    settings.flush()
+    print(f"DEBUG: Aggiornata versione installata a: {version}")
 
-def check_installer_update():
+def check_installer_update(metadata):
     """
-    Richiede il file remoto (launcher_info.txt) e restituisce una tupla
-    (online_version, download_link). Se c'è un errore, restituisce (None, None).
+    Legge il file remoto (launcher_info.txt) e restituisce le informazioni
+    di aggiornamento (vedi parse_update_info), oppure None se c'è un errore.
+    Il file passa dalla cache dei metadati: entro UPDATE_INFO_TTL non viene
+    richiesto e senza rete si usa l'ultima copia ricevuta.
     """
     try:
-        print("DEBUG: Richiedo il file remoto all'URL:", LAUNCHER_UPDATE_INFO_URL)
-        response = requests.get(LAUNCHER_UPDATE_INFO_URL, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
-        print("DEBUG: Status code ricevuto:", response.status_code)
-        print("DEBUG: Contenuto del file remoto:", repr(response.text))
-        if response.status_code == 200:
-            lines = response.text.strip().splitlines()
-            print("DEBUG: Numero di righe lette dal file:", len(lines))
-            if len(lines) >= 2:
-                online_version = lines[0].strip()
-                download_link = lines[1].strip()
-                print("DEBUG: Versione online letta:", online_version)
-                print("DEBUG: Download link letto:", download_link)
-                return online_version, download_link
-            else:
-                print("DEBUG: Il file remoto non contiene almeno 2 righe.")
-        else:
-            print("DEBUG: Il server non ha restituito il codice 200.")
+        print("DEBUG: Leggo il file remoto all'URL:", LAUNCHER_UPDATE_INFO_URL)
+        text, source = metadata.get(LAUNCHER_UPDATE_INFO_URL, headers={"User-Agent": "Mozilla/5.0"},
+                                    background=False)
+        print(f"DEBUG: Contenuto del file remoto ({source}):", repr(text))
+        if text is None:
+            print("DEBUG: File remoto non disponibile e non presente in cache.")
+            return None
+        info = parse_update_info(text)
+        print("DEBUG: Informazioni di aggiornamento:", info)
+        return info
     except Exception as e:
         print("DEBUG: Errore nel controllo aggiornamenti:", e)
-    return None, None
+    return None
 
-def download_installer(download_url, new_version):
+def cached_update_info(metadata):
     """
-    Scarica l'installer dal download_url e lo salva nella cartella SETTINGS_FOLDER.
-    Utilizza l'header "User-Agent" per simulare una richiesta da browser.
-    Restituisce il percorso del file scaricato, oppure None in caso di errore.
+    Le informazioni di aggiornamento dell'ultimo controllo, senza usare la rete.
     """
-    installer_filename = f"installer_{new_version}.exe"
-    installer_path = os.path.join(SETTINGS_FOLDER, installer_filename)
+    entry = metadata.entries.get(LAUNCHER_UPDATE_INFO_URL)
+    if not entry:
+        return None
     try:
-        print(f"DEBUG: Scarico il nuovo installer versione {new_version} in {installer_path}...")
-        response = requests.get(download_url, headers={"User-Agent": "Mozilla/5.0"}, stream=True, timeout=10)
-        print("DEBUG: Status code del download:", response.status_code)
-        response.raise_for_status()
-        with open(installer_path, 'wb') as f:
-            total_bytes = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    total_bytes += len(chunk)
-            print("DEBUG: Totale byte scaricati:", total_bytes)
-        print("DEBUG: Download completato!")
-        return installer_path
-    except Exception as e:
-        print("DEBUG: Errore nel download dell'installer:", e)
+        return parse_update_info(entry["value"])
+    except ValueError:
+        return None
+
+def parse_update_info(text):
+    """
+    Interpreta launcher_info.txt. Il formato strutturato è un oggetto JSON:
+        {"version": "1.5", "url": "https://...", "mirrors": ["https://..."],
+         "size": 12345678, "sha256": "...", "mandatory": false}
+    (mirrors, size, sha256 e mandatory sono facoltativi). Con mandatory
+    l'updater, finché l'ultimo manifest ricevuto lo indica, ricontrolla il
+    manifest scaduto prima di avviare l'installer invece che dopo, e non
+    avvia una versione più vecchia di quella pubblicata (vedi main). Il formato
+    precedente, ancora accettato, ha versione e link su due righe e
+    facoltativamente "<sha256> [dimensione]" sulla terza.
+    Restituisce un dict con version, urls (il link e poi i mirror), sha256,
+    size e mandatory. Solleva ValueError se il file non è valido.
+    """
+    text = text.strip()
+    if text.startswith("{"):
+        data = json.loads(text)
+        if not data.get("version") or not data.get("url"):
+            raise ValueError("version e url sono obbligatori")
+        sha256 = data.get("sha256")
+        if sha256 is not None and parse_checksum_line(sha256) is None:
+            raise ValueError(f"sha256 non valido: {sha256}")
+        size = data.get("size")
+        if size is not None and (not isinstance(size, int) or size <= 0):
+            raise ValueError(f"size non valido: {size}")
+        return {
+            "version": str(data["version"]),
+            "urls": [data["url"], *data.get("mirrors", [])],
+            "sha256": sha256.lower() if sha256 else None,
+            "size": size,
+            "mandatory": bool(data.get("mandatory", False)),
+        }
+    lines = text.splitlines()
+    if len(lines) < 2:
+        raise ValueError("Il file remoto non contiene almeno 2 righe.")
+    checksum = (parse_checksum_line(lines[2]) if len(lines) >= 3 else None) or {}
+    return {
+        "version": lines[0].strip(),
+        "urls": [lines[1].strip()],
+        "sha256": checksum.get("sha256"),
+        "size": checksum.get("size"),
+        "mandatory": False,
+    }
+
+def parse_checksum_line(line):
+    """
+    Interpreta la riga "<sha256> [dimensione]" di launcher_info.txt.
+    Restituisce un dict con sha256 e size, oppure None se la riga non è valida.
+    """
+    parts = line.split()
+    if not parts or len(parts[0]) != 64:
+        return None
+    try:
+        int(parts[0], 16)
+        size = int(parts[1]) if len(parts) > 1 else None
+    except ValueError:
         return None
+    return {"sha256": parts[0].lower(), "size": size}
+
+def installer_path_for(version):
+    return os.path.join(SETTINGS_FOLDER, f"installer_{version}.exe")
+
+def check_installer(settings, installer_path, sha256=None, size=None):
+    """
+    Controlla l'installer in cache: prima la dimensione, poi l'hash letto a
+    blocchi. Restituisce "ok", "missing", "corrupt" oppure "unverified"
+    (né hash né dimensione con cui confrontarlo: non va avviato, va
+    riscaricato). Il risultato dell'hash viene ricordato (nome, dimensione,
+    mtime, hash) così finché il file non cambia non va riletto a ogni avvio.
+    """
+    try:
+        stat = os.stat(installer_path)
+    except OSError:
+        return "missing"
+    if stat.st_size == 0 or (size is not None and stat.st_size != size):
+        print(f"DEBUG: Installer {installer_path} di {stat.st_size} byte invece di {size}: corrotto.")
+        return "corrupt"
+    if sha256 is None:
+        if size is None:
+            print(f"DEBUG: Installer {installer_path} senza hash né dimensione con cui verificarlo.")
+            return "unverified"
+        return "ok"
+    stamp = [os.path.basename(installer_path), stat.st_size, stat.st_mtime_ns, sha256]
+    if settings.get("installer_verified") == stamp:
+        return "ok"
+    if hash_file(installer_path).hexdigest() != sha256:
+        print(f"DEBUG: Hash dell'installer {installer_path} diverso da quello atteso: corrotto.")
+        return "corrupt"
+    settings.set("installer_verified", stamp)
+    return "ok"
 
-def remove_old_installers(current_version):
+def verify_cached_installer(settings, installer_path):
     """
-    Rimuove tutti i file installer_*.exe nella cartella SETTINGS_FOLDER che non
-    corrispondono alla current_version.
+    Verifica l'installer della versione installata con hash e dimensione
+    salvati al download; se è corrotto viene eliminato (e riscaricato).
+    Un installer senza hash né dimensione salvati (scaricato da una versione
+    precedente dell'updater) non conta come valido.
+    """
+    state = check_installer(settings, installer_path, settings.get("installer_sha256"), settings.get("installer_size"))
+    if state == "corrupt":
+        discard_installer(installer_path)
+    return state == "ok"
+
+def remote_size(urls):
+    """
+    Dimensione dell'installer secondo il Content-Length di una richiesta
+    HEAD (per i manifest senza hash né dimensione), oppure None.
+    """
+    for url in urls:
+        try:
+            response = http_client.request("HEAD", url, headers={"User-Agent": "Mozilla/5.0"}, allow_redirects=True)
+        except Exception as e:
+            print(f"DEBUG: HEAD {url} fallita:", e)
+            continue
+        length = response.headers.get("Content-Length")
+        # Con Content-Encoding la lunghezza è quella compressa
+        if response.status_code == 200 and length and length.isdigit() and not response.headers.get("Content-Encoding"):
+            return int(length)
+    return None
+
+def discard_installer(installer_path):
+    # Anche un eventuale download parziale con lo stesso nome è di un'altra build
+    discard_partial(installer_path)
+    if os.path.exists(installer_path):
+        try:
+            os.remove(installer_path)
+            print("DEBUG: Eliminato installer non valido:", installer_path)
+        except OSError as e:
+            print(f"DEBUG: Errore eliminando {installer_path}: {e}")
+
+def is_update_needed(online_version, installed_version):
+    try:
+        return float(online_version) > float(installed_version)
+    except Exception as e:
+        print("DEBUG: Errore nel confronto delle versioni:", e)
+        return online_version != installed_version
+
+def download_installer(info):
+    """
+    Scarica l'installer descritto da info (vedi parse_update_info) e lo salva
+    nella cartella SETTINGS_FOLDER, provando il link principale e poi i mirror.
+    Utilizza l'header "User-Agent" per simulare una richiesta da browser.
+    Il download è riprendibile: se si interrompe, il file parziale resta in
+    SETTINGS_FOLDER e al prossimo avvio si riparte da lì (vedi downloads.py).
+    Hash e dimensione, se indicati, vengono verificati prima di mettere
+    l'installer al suo posto.
+    Restituisce (percorso, sha256, dimensione) del file scaricato, oppure None in caso di errore.
+    """
+    installer_path = installer_path_for(info["version"])
+    for url in info["urls"]:
+        try:
+            print(f"DEBUG: Scarico il nuovo installer versione {info['version']} da {url} in {installer_path}...")
+            result = download_file(url, installer_path, headers={"User-Agent": "Mozilla/5.0"},
+                                   expected_sha256=info["sha256"], expected_size=info["size"])
+            print("DEBUG: Totale byte scaricati:", result["size"], "- ripreso:", result["resumed"])
+            print("DEBUG: Download completato!")
+            return installer_path, result["sha256"], result["size"]
+        except Exception as e:
+            print("DEBUG: Errore nel download dell'installer (il parziale resta per il prossimo avvio):", e)
+    return None
+
+def remove_old_installers(current_version, keep=None):
+    """
+    Rimuove tutti i file installer_*.exe (e i loro download parziali) nella
+    cartella SETTINGS_FOLDER che non corrispondono alla current_version.
+    keep è un installer da non toccare (quello appena avviato, ancora in uso).
     """
     for filename in os.listdir(SETTINGS_FOLDER):
-        if filename.startswith("installer_") and filename.endswith(".exe"):
-            if current_version not in filename:
-                file_path = os.path.join(SETTINGS_FOLDER, filename)
+        if filename.startswith("installer_") and filename.endswith((".exe", PART_SUFFIX, JOURNAL_SUFFIX)):
+            file_path = os.path.join(SETTINGS_FOLDER, filename)
+            if current_version not in filename and file_path != keep:
                 try:
                     os.remove(file_path)
                     print(f"DEBUG: Eliminato vecchio installer: {file_path}")
@@ -144,14 +280,15 @@ def get_stable_updater_path():
 def ensure_stable_location():
     """
     Se il file eseguibile corrente (l'updater) non si trova nella posizione stabile,
-    lo copia lì e restituisce il percorso stabile.
+    lo porta lì e restituisce il percorso stabile. Se la copia stabile è già
+    identica non viene riscritta (vedi sync_file).
     """
     stable_path = get_stable_updater_path()
     current_path = os.path.abspath(sys.argv[0])
     if current_path.lower() != stable_path.lower():
         try:
-            shutil.copy2(current_path, stable_path)
-            print(f"DEBUG: Copiato l'updater in posizione stabile: {stable_path}")
+            outcome = sync_file(current_path, stable_path)
+            print(f"DEBUG: Updater in posizione stabile ({outcome}): {stable_path}")
         except Exception as e:
             print("DEBUG: Errore copiando l'updater nella posizione stabile:", e)
     else:
@@ -161,46 +298,119 @@ def ensure_stable_location():
 # ===============================================
 # FLUSSO PRINCIPALE DELL'UPDATER
 # ===============================================
+def stage_update(metadata, settings, keep=None):
+    """
+    Controlla launcher_info.txt e, se c'è una versione nuova o l'installer
+    della versione online manca o è corrotto, lo scarica e lo registra come
+    installato, così viene usato dal prossimo avvio. keep è l'installer già
+    avviato, da non eliminare. Restituisce il percorso dell'installer più
+    recente disponibile, oppure None se non ce n'è uno valido.
+    """
+    installed_version = get_installed_installer_version(settings)
+    current_path = installer_path_for(installed_version)
+    info = check_installer_update(metadata)
+    startup_profile.mark("controllo versione")
+    if info is None:
+        print("DEBUG: Impossibile recuperare le informazioni di aggiornamento, resto alla versione", installed_version)
+        return current_path if verify_cached_installer(settings, current_path) else None
+
+    online_version = info["version"]
+    update_needed = is_update_needed(online_version, installed_version)
+    print(f"DEBUG: Versione online: {online_version} vs Installata: {installed_version}. Update needed: {update_needed}")
+    installer_path = installer_path_for(online_version)
+    if not update_needed:
+        # Stessa versione: l'installer in cache deve corrispondere al manifest o, se il
+        # manifest non li indica, a hash e dimensione salvati al download
+        same_version = online_version == installed_version
+        sha256 = info["sha256"] or (settings.get("installer_sha256") if same_version else None)
+        size = info["size"] or (settings.get("installer_size") if same_version else None)
+        if sha256 is None and size is None and os.path.exists(installer_path):
+            size = remote_size(info["urls"])
+        state = check_installer(settings, installer_path, sha256, size)
+        startup_profile.mark("verifica installer online")
+        if state == "ok":
+            print("DEBUG: Nessun aggiornamento necessario.")
+            if same_version and (sha256, size) != (settings.get("installer_sha256"), settings.get("installer_size")):
+                save_installed_installer_version(settings, online_version, sha256, os.path.getsize(installer_path))
+            # Installer lasciati da un aggiornamento precedente mentre erano in uso
+            remove_old_installers(online_version, keep=keep)
+            return installer_path
+        if state == "corrupt" and installer_path == keep:
+            # Build ripubblicata con la stessa versione mentre quella vecchia è in esecuzione:
+            # non si può sostituire (su Windows il file è bloccato). Senza hash e dimensione
+            # salvati il prossimo avvio non la avvia, aspetta il controllo e la riscarica.
+            print("DEBUG: L'installer avviato non corrisponde più al manifest, lo riscarico al prossimo avvio.")
+            settings.update({"installer_sha256": None, "installer_size": None, "installer_verified": None})
+            settings.flush()
+            return installer_path
+        if state == "corrupt":
+            discard_installer(installer_path)
+
+    print("DEBUG: Scarico la nuova versione dell'installer...")
+    downloaded = download_installer(info)
+    startup_profile.mark("download")
+    if downloaded is None:
+        return current_path if verify_cached_installer(settings, current_path) else None
+    new_installer_path, sha256, size = downloaded
+    save_installed_installer_version(settings, online_version, sha256, size)
+    remove_old_installers(online_version, keep=keep)
+    return new_installer_path
+
+def finish(code):
+    """
+    Stampa le statistiche di rete e i tempi di ogni fase, poi esce con code.
+    """
+    http_client.log_stats("DEBUG:")
+    startup_profile.report("Tempi dell'updater", always=True)
+    sys.exit(code)
+
 def main():
     print("DEBUG: Avvio dell'updater.")
-    # Recupera le informazioni dal file remoto
-    online_version, download_link = check_installer_update()
-    if online_version is None or download_link is None:
-        online_version = CURRENT_INSTALLER_VERSION
-        print("DEBUG: Impossibile recuperare le informazioni di aggiornamento, uso la versione corrente:", online_version)
-    
-    installed_version = get_installed_installer_version()
-    try:
-        update_needed = float(online_version) > float(installed_version)
-    except Exception as e:
-        print("DEBUG: Errore nel confronto delle versioni:", e)
-        update_needed = online_version != installed_version
+    settings = SettingsStore(SETTINGS_FILE)
+    # launcher_info.txt passa dalla cache dei metadati: entro il TTL nessuna richiesta
+    metadata = MetadataCache(METADATA_CACHE_FILE, ttl=UPDATE_INFO_TTL)
+    policy = settings.get("update_policy", "background")
+    installed_version = get_installed_installer_version(settings)
+    cached_path = installer_path_for(installed_version)
+    # Se l'ultimo manifest ricevuto era obbligatorio, quello scaduto si ricontrolla prima
+    # dell'avvio: un aggiornamento obbligatorio pubblicato nel frattempo va installato subito
+    cached_info = cached_update_info(metadata)
+    if policy != "mandatory" and cached_info and cached_info["mandatory"]:
+        age = metadata.age(LAUNCHER_UPDATE_INFO_URL)
+        if age is None or not 0 <= age < UPDATE_INFO_TTL:
+            print("DEBUG: Manifest obbligatorio scaduto, lo ricontrollo prima dell'avvio.")
+            cached_info = check_installer_update(metadata) or cached_info
+    # Un aggiornamento obbligatorio non ancora installato (anche se il download in background è fallito)
+    if cached_info and cached_info["mandatory"] and is_update_needed(cached_info["version"], installed_version):
+        print("DEBUG: L'ultimo manifest richiede l'aggiornamento", cached_info["version"])
+        policy = "mandatory"
+    startup_profile.mark("impostazioni e cache")
 
-    print(f"DEBUG: Versione online: {online_version} vs Installata: {installed_version}. Update needed: {update_needed}")
-    
-    installer_filename = f"installer_{online_version}.exe"
-    installer_path = os.path.join(SETTINGS_FOLDER, installer_filename)
-    
-    if update_needed or not os.path.exists(installer_path):
-        print("DEBUG: Scarico la nuova versione dell'installer...")
-        new_installer_path = download_installer(download_link, online_version)
-        if new_installer_path is None:
-            print("DEBUG: Errore nel download dell'installer. Impossibile continuare.")
-            sys.exit(1)
-        installer_path = new_installer_path
-        save_installed_installer_version(online_version)
-        remove_old_installers(online_version)
-    else:
-        print("DEBUG: Nessun aggiornamento necessario. Uso l'installer già presente.")
-    
-    if installer_path and os.path.exists(installer_path):
-        launch_installer(installer_path)
-    else:
-        print("DEBUG: Errore: installer non disponibile.")
-    
-    sys.exit(0)
+    cached_valid = policy != "mandatory" and verify_cached_installer(settings, cached_path)
+    startup_profile.mark("verifica installer in cache")
+    if cached_valid:
+        # Avvio immediato dell'installer già scaricato; controllo e download
+        # continuano qui dopo l'avvio e l'eventuale nuova versione vale dal prossimo
+        print("DEBUG: Avvio subito l'installer in cache, controllo gli aggiornamenti dopo.")
+        launch_installer(cached_path)
+        startup_profile.mark("avvio installer")
+        staged_path = stage_update(metadata, settings, keep=cached_path)
+        if staged_path and staged_path != cached_path:
+            print("DEBUG: Nuovo installer pronto per il prossimo avvio:", staged_path)
+        finish(0)
+
+    # Installer mancante o corrotto (viene riscaricato) o aggiornamenti obbligatori: si aspetta il controllo
+    print(f"DEBUG: Controllo gli aggiornamenti prima dell'avvio (policy: {policy}).")
+    installer_path = stage_update(metadata, settings)
+    if installer_path is None:
+        print("DEBUG: Errore: installer non disponibile. Impossibile continuare.")
+        finish(1)
+    launch_installer(installer_path)
+    startup_profile.mark("avvio installer")
+    finish(0)
 
 if __name__ == "__main__":
     # Assicuriamoci che l'updater si installi nella posizione stabile
     stable_updater_path = ensure_stable_location()
+    startup_profile.mark("posizione stabile")
     main()
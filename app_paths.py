@@ -0,0 +1,36 @@
+"""
+Percorsi dei dati locali dell'installer (%LOCALAPPDATA%\\InstallerTraduzioneMRREVO).
+
+I percorsi si calcolano all'import, ma la cartella viene creata solo quando
+serve davvero scriverci (ensure_settings_folder), non all'avvio.
+"""
+import os
+import threading
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+SETTINGS_FOLDER = os.path.join(os.getenv('LOCALAPPDATA'), "InstallerTraduzioneMRREVO")
+SETTINGS_FILE = os.path.join(SETTINGS_FOLDER, "settings.json")
+DISCOVERY_INDEX_FILE = os.path.join(SETTINGS_FOLDER, "discovery_index.json")
+PAYLOAD_STATE_FILE = os.path.join(SETTINGS_FOLDER, "payload_state.json")
+PAYLOAD_CACHE_FOLDER = os.path.join(SETTINGS_FOLDER, "payload_cache")
+METADATA_CACHE_FILE = os.path.join(SETTINGS_FOLDER, "metadata_cache.json")
+
+_folder_ready = False
+_folder_lock = threading.Lock()
+
+def settings_path(filename):
+    return os.path.join(SETTINGS_FOLDER, filename)
+
+def ensure_settings_folder():
+    """
+    Crea SETTINGS_FOLDER se non esiste (una sola volta per processo) e ne
+    restituisce il percorso.
+    """
+    global _folder_ready
+    if not _folder_ready:
+        with _folder_lock:
+            os.makedirs(SETTINGS_FOLDER, exist_ok=True)
+            _folder_ready = True
+    return SETTINGS_FOLDER
@@ -0,0 +1,83 @@
+"""
+Scrittura sicura dei file installati e scaricati.
+
+Ogni file viene scritto accanto alla destinazione in un temporaneo, portato
+su disco con fsync e poi rinominato con os.replace: se il programma viene
+chiuso a metà resta il file vecchio o quello nuovo completo, mai un
+global.ini o un installer troncato.
+"""
+import os
+import hashlib
+
+CHUNK_SIZE = 1024 * 1024
+
+def hash_file(path, digest=None):
+    """
+    Aggiorna digest (di default un nuovo sha256) con il contenuto del file e lo restituisce.
+    """
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest
+
+def replace_file(tmp_path, target_path):
+    """
+    Porta su disco tmp_path (fsync) e lo rinomina in target_path in un solo
+    passo: chi legge target_path vede il file vecchio o quello nuovo completo,
+    mai uno scritto a metà.
+    """
+    with open(tmp_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, target_path)
+
+def atomic_write(path, data):
+    """
+    Scrive data (bytes o str) in path passando da un file temporaneo accanto.
+    Il testo viene sempre scritto in UTF-8, come lo rileggono i moduli che
+    usano questa funzione (non nella codifica locale, cp1252 su Windows).
+    """
+    tmp_path = path + ".tmp"
+    if isinstance(data, bytes):
+        f = open(tmp_path, "wb")
+    else:
+        f = open(tmp_path, "w", encoding="utf-8")
+    with f:
+        f.write(data)
+    replace_file(tmp_path, path)
+
+def sync_file(src_path, target_path):
+    """
+    Porta in target_path una copia identica di src_path, senza riscriverla
+    se c'è già: stessa dimensione e stessa mtime (copy2 la conserva) bastano,
+    con mtime diversa si confrontano gli hash. Sullo stesso volume si crea
+    un hard link invece di copiare i byte; altrimenti si copia passando da
+    un temporaneo. Restituisce "unchanged", "linked" o "copied".
+    """
+    src_stat = os.stat(src_path)
+    try:
+        target_stat = os.stat(target_path)
+    except FileNotFoundError:
+        target_stat = None
+    if target_stat is not None and target_stat.st_size == src_stat.st_size:
+        if target_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return "unchanged"
+        if hash_file(src_path).digest() == hash_file(target_path).digest():
+            # Stessa mtime per i prossimi controlli, così non si rilegge più
+            os.utime(target_path, ns=(target_stat.st_atime_ns, src_stat.st_mtime_ns))
+            return "unchanged"
+    tmp_path = target_path + ".tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(src_path, tmp_path)
+        os.replace(tmp_path, target_path)
+        return "linked"
+    except OSError:
+        # Volumi diversi o file system senza hard link (FAT, alcune condivisioni di rete)
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    import shutil
+    shutil.copy2(src_path, tmp_path)
+    replace_file(tmp_path, target_path)
+    return "copied"
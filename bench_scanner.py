@@ -0,0 +1,292 @@
+"""
+Benchmark del crawler delle installazioni.
+
+Genera alberi di cartelle sintetici e riproducibili (profili utente
+profondi, cartelle con molti file piccoli, librerie Steam larghe, finte
+cartelle StarCitizen senza Data.p4k, loop di symlink, più canali di gioco)
+e ci fa girare i crawler: il vecchio os.walk, TreeWalker e l'intera
+scan_installations. Per ogni scenario e crawler riporta tempo, cartelle
+visitate, chiamate al filesystem per installazione trovata e picco di
+memoria; con --json i risultati vengono salvati in formato leggibile da
+programma per confrontare versioni diverse dello scanner.
+
+Uso: python bench_scanner.py [--scenario NOME ...] [--scale N] [--seed N] [--json FILE]
+     python bench_scanner.py --root CARTELLA   (scansiona una cartella esistente)
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import contextlib
+import platform
+import tempfile
+import itertools
+import tracemalloc
+
+from scanner import GAME_ARCHIVE, TreeWalker, scan_installations
+
+# ------------------------------------------------------------
+#                 FORMA DEGLI ALBERI SINTETICI
+# ------------------------------------------------------------
+DEFAULT_SHAPE = {
+    "system_width": 4,       # Windows/System32 e simili: larghezza e profondità
+    "system_depth": 3,
+    "profiles": 1,           # profili utente in Users/
+    "profile_width": 3,
+    "profile_depth": 3,
+    "file_dirs": 10,         # cartelle piene di file piccoli
+    "files_per_dir": 20,
+    "steam_games": 20,       # giochi nella libreria Steam
+    "steam_depth": 2,
+    "decoys": 2,             # cartelle StarCitizen/<CANALE> senza Data.p4k
+    "symlink_loops": 0,      # symlink che puntano alla cartella padre
+    "channels": ["LIVE"],    # canali installati sotto Program Files
+}
+
+SCENARIOS = {
+    "baseline": {},
+    "deep_profiles": {"profiles": 4, "profile_width": 2, "profile_depth": 9},
+    "many_files": {"file_dirs": 200, "files_per_dir": 500},
+    "wide_steam": {"steam_games": 400, "steam_depth": 3},
+    "decoys": {"decoys": 60},
+    "symlink_loops": {"symlink_loops": 30},
+    "channels": {"channels": ["LIVE", "PTU", "EPTU", "TECH-PREVIEW", "HOTFIX"]},
+}
+# Parametri moltiplicati da --scale
+SCALED_KEYS = ("profiles", "file_dirs", "files_per_dir", "steam_games", "decoys", "symlink_loops")
+
+def make_dirs(base, width, depth):
+    if depth == 0:
+        return
+    for i in range(width):
+        path = os.path.join(base, f"dir{i}")
+        os.makedirs(path, exist_ok=True)
+        make_dirs(path, width, depth - 1)
+
+def build_tree(root, shape=None, scale=1, seed=0):
+    """
+    Crea l'albero sintetico sotto root e restituisce l'elenco ordinato delle
+    installazioni (nome, percorso) che un crawler corretto deve trovare.
+    shape sovrascrive i parametri di DEFAULT_SHAPE; lo stesso seed produce
+    sempre lo stesso albero.
+    """
+    params = dict(DEFAULT_SHAPE)
+    params.update(shape or {})
+    for key in SCALED_KEYS:
+        params[key] *= scale
+    rng = random.Random(seed)
+
+    make_dirs(os.path.join(root, "Windows", "System32"), params["system_width"], params["system_depth"])
+    make_dirs(os.path.join(root, "$Recycle.Bin"), params["system_width"], 2)
+
+    for p in range(params["profiles"]):
+        profile = os.path.join(root, "Users", f"Utente{p}")
+        make_dirs(os.path.join(profile, "AppData", "Local"), params["profile_width"], params["profile_depth"])
+        make_dirs(os.path.join(profile, "Documents"), params["profile_width"], params["profile_depth"])
+        make_dirs(os.path.join(profile, "Documents", "progetto", "node_modules"), params["profile_width"] + 2, 3)
+
+    for d in range(params["file_dirs"]):
+        path = os.path.join(root, "Dati", f"cartella{d}")
+        os.makedirs(path, exist_ok=True)
+        for f in range(params["files_per_dir"]):
+            open(os.path.join(path, f"file{f}.txt"), "wb").close()
+
+    for g in range(params["steam_games"]):
+        make_dirs(os.path.join(root, "SteamLibrary", "steamapps", "common", f"Gioco{g}"), 2, params["steam_depth"])
+        make_dirs(os.path.join(root, "Giochi", f"Gioco{g}"), 2, params["steam_depth"])
+
+    for d in range(params["decoys"]):
+        base = os.path.join(root, "Backup", *[f"livello{i}" for i in range(rng.randint(0, 4))], f"copia{d}")
+        decoy = os.path.join(base, "StarCitizen", rng.choice(["LIVE", "PTU"]))
+        make_dirs(os.path.join(decoy, "Data"), 2, 2)
+        # Un file con nome simile ma non l'archivio del gioco
+        open(os.path.join(decoy, "Data.p4k.bak"), "wb").close()
+
+    for n in range(params["symlink_loops"]):
+        path = os.path.join(root, "Collegamenti", f"loop{n}")
+        os.makedirs(path, exist_ok=True)
+        try:
+            os.symlink(path, os.path.join(path, "ciclo"), target_is_directory=True)
+        except (OSError, NotImplementedError):
+            # Su Windows servono privilegi per creare symlink: lo scenario resta senza loop
+            break
+
+    installs = []
+    for channel in params["channels"]:
+        game_root = os.path.join(root, "Program Files", "Roberts Space Industries", "StarCitizen", channel)
+        make_dirs(os.path.join(game_root, "Data"), 3, 3)
+        make_dirs(os.path.join(game_root, "Bin64"), 2, 2)
+        open(os.path.join(game_root, GAME_ARCHIVE), "wb").close()
+        installs.append((channel, game_root))
+    return sorted(installs)
+
+# ------------------------------------------------------------
+#                 CONTEGGIO DELLE CHIAMATE AL FILESYSTEM
+# ------------------------------------------------------------
+class FsCallCounter:
+    """
+    Conta le chiamate a os.scandir, os.listdir, os.stat e os.lstat (anche
+    quelle fatte da os.walk e os.path) mentre è attivo. Le stat fatte
+    internamente da DirEntry non passano da qui e non vengono contate.
+    """
+    PATCHED = ("scandir", "listdir", "stat", "lstat")
+
+    def __init__(self):
+        self.counter = itertools.count()
+        self.originals = {}
+
+    def __enter__(self):
+        for name in self.PATCHED:
+            original = getattr(os, name)
+            self.originals[name] = original
+            setattr(os, name, self._wrap(original))
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self.originals.items():
+            setattr(os, name, original)
+
+    def _wrap(self, original):
+        def wrapper(*args, **kwargs):
+            next(self.counter)
+            return original(*args, **kwargs)
+        return wrapper
+
+    @property
+    def calls(self):
+        # next() restituisce quante chiamate sono state contate finora
+        return next(self.counter)
+
+# ------------------------------------------------------------
+#                 CRAWLER DA CONFRONTARE
+# ------------------------------------------------------------
+def run_legacy(root):
+    """
+    Il crawler originale di search_drive basato su os.walk.
+    """
+    folders = []
+    visited = 0
+    for path, dirs, files in os.walk(root):
+        visited += 1
+        if 'StarCitizen' in path and GAME_ARCHIVE in files:
+            folders.append((os.path.basename(path), path))
+    return folders, visited
+
+def run_tree_walker(root):
+    walker = TreeWalker()
+    folders = list(walker.walk(root))
+    return folders, walker.dirs_visited
+
+def run_scan_engine(root):
+    """
+    L'intero motore di ricerca (gruppi per dispositivo, worker paralleli),
+    forzando la scansione del drive senza percorsi noti né indice.
+    """
+    folders = []
+    visited = 0
+    for kind, payload in scan_installations(drives=[root], force_rescan=True, launcher_dir=""):
+        if kind == "found":
+            folders.append(payload)
+        elif kind == "progress":
+            visited = payload["dirs_visited"]
+    return folders, visited
+
+CRAWLERS = {
+    "os.walk": run_legacy,
+    "TreeWalker": run_tree_walker,
+    "scan_installations": run_scan_engine,
+}
+
+def measure(crawler, root, expected):
+    """
+    Esegue il crawler due volte: la prima misura tempo e chiamate al
+    filesystem, la seconda (con tracemalloc attivo, che rallenta) il picco
+    di memoria. Restituisce un dict con i risultati.
+    """
+    with FsCallCounter() as counter:
+        start = time.perf_counter()
+        folders, visited = CRAWLERS[crawler](root)
+        wall_time = time.perf_counter() - start
+        fs_calls = counter.calls
+    tracemalloc.start()
+    CRAWLERS[crawler](root)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "crawler": crawler,
+        "wall_time_s": round(wall_time, 6),
+        "dirs_visited": visited,
+        "roots_found": len(folders),
+        "roots_expected": len(expected) if expected is not None else None,
+        "correct": sorted(folders) == expected if expected is not None else None,
+        "fs_calls": fs_calls,
+        "fs_calls_per_root": round(fs_calls / len(folders), 1) if folders else None,
+        "peak_memory_bytes": peak_memory,
+    }
+
+def print_table(results):
+    print(f"{'scenario':<16}{'crawler':<20}{'cartelle':>10}{'trovate':>9}{'fs/inst.':>10}"
+          f"{'memoria KB':>12}{'tempo (ms)':>12}  ok")
+    for r in results:
+        fs_per_root = "-" if r["fs_calls_per_root"] is None else f"{r['fs_calls_per_root']:.0f}"
+        ok = {True: "si", False: "NO", None: "-"}[r["correct"]]
+        print(f"{r['scenario']:<16}{r['crawler']:<20}{r['dirs_visited']:>10}{r['roots_found']:>9}"
+              f"{fs_per_root:>10}{r['peak_memory_bytes'] / 1024:>12.0f}{r['wall_time_s'] * 1000:>12.1f}  {ok}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del crawler delle installazioni")
+    parser.add_argument("--root", help="Cartella esistente da scansionare al posto degli alberi sintetici")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario da eseguire (ripetibile, di default tutti)")
+    parser.add_argument("--crawler", action="append", choices=sorted(CRAWLERS),
+                        help="Crawler da misurare (ripetibile, di default tutti)")
+    parser.add_argument("--scale", type=int, default=1, help="Fattore di scala degli alberi sintetici")
+    parser.add_argument("--seed", type=int, default=0, help="Seme per rendere riproducibili gli alberi")
+    parser.add_argument("--json", help="File in cui salvare i risultati in JSON ('-' per stdout)")
+    args = parser.parse_args()
+    crawlers = args.crawler or list(CRAWLERS)
+
+    results = []
+    # I messaggi [DEBUG] dello scanner vanno su stderr per non sporcare il JSON
+    quiet = contextlib.redirect_stdout(sys.stderr) if args.json == "-" else contextlib.nullcontext()
+    with quiet:
+        if args.root:
+            for crawler in crawlers:
+                result = measure(crawler, args.root, None)
+                result["scenario"] = os.path.basename(os.path.normpath(args.root)) or args.root
+                results.append(result)
+        else:
+            for scenario in args.scenario or list(SCENARIOS):
+                tmp_root = tempfile.mkdtemp(prefix="sc_bench_")
+                try:
+                    expected = build_tree(tmp_root, SCENARIOS[scenario], args.scale, args.seed)
+                    for crawler in crawlers:
+                        result = measure(crawler, tmp_root, expected)
+                        result["scenario"] = scenario
+                        results.append(result)
+                finally:
+                    shutil.rmtree(tmp_root, ignore_errors=True)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    else:
+        print_table(results)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=4)
+    return 0 if all(r["correct"] is not False for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Varianti compresse dei file della traduzione.
+
+global.ini è testo e si comprime molto bene: release_tools.py pubblica
+accanto al file completo una versione gzip e, se richiesto, xz e zstd.
+L'installer sceglie la migliore che sa leggere e la decomprime mentre
+arriva, scrivendo direttamente nella cache senza mai tenere in memoria il
+file intero.
+zstd richiede il pacchetto opzionale zstandard; gzip e xz sono nella
+libreria standard.
+"""
+import zlib
+import lzma
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+# In ordine di preferenza (rapporto di compressione / velocità)
+PREFERRED_ENCODINGS = ("zstd", "xz", "gzip")
+EXTENSIONS = {"gzip": ".gz", "xz": ".xz", "zstd": ".zst"}
+CHUNK_SIZE = 64 * 1024
+# Massimo di byte decompressi prodotti per volta, anche da un chunk molto comprimibile
+MAX_OUTPUT = 1024 * 1024
+
+class CompressionError(Exception):
+    pass
+
+def available_encodings():
+    """
+    Codifiche che questa installazione sa decomprimere, in ordine di preferenza.
+    """
+    return [encoding for encoding in PREFERRED_ENCODINGS if encoding != "zstd" or zstandard is not None]
+
+def encoding_for_path(path):
+    for encoding, extension in EXTENSIONS.items():
+        if path.endswith(extension):
+            return encoding
+    return None
+
+# ------------------------------------------------------------
+#                 DECOMPRESSIONE
+# ------------------------------------------------------------
+def decompress_stream(chunks, encoding, progress_callback=None):
+    """
+    Genera i byte decompressi dei pezzi compressi prodotti da chunks (ad
+    esempio iter_content di una risposta HTTP), senza accumularli.
+    progress_callback riceve (byte compressi letti, byte decompressi prodotti).
+    """
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(wbits=31)
+        def feed(data):
+            out = decompressor.decompress(data, MAX_OUTPUT)
+            while out:
+                yield out
+                # Arrivati a MAX_OUTPUT, l'input non ancora elaborato resta in unconsumed_tail
+                out = decompressor.decompress(decompressor.unconsumed_tail, MAX_OUTPUT) if decompressor.unconsumed_tail else b""
+        finished = lambda: decompressor.eof
+    elif encoding == "xz":
+        decompressor = lzma.LZMADecompressor()
+        def feed(data):
+            out = decompressor.decompress(data, MAX_OUTPUT)
+            while out:
+                yield out
+                # Arrivati a MAX_OUTPUT, l'input resta nel buffer interno del decompressore
+                out = b"" if decompressor.needs_input or decompressor.eof else decompressor.decompress(b"", MAX_OUTPUT)
+        finished = lambda: decompressor.eof
+    elif encoding == "zstd":
+        if zstandard is None:
+            raise CompressionError("Il pacchetto zstandard non è installato")
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        def feed(data):
+            out = decompressor.decompress(data)
+            if out:
+                yield out
+        finished = lambda: decompressor.eof
+    else:
+        raise CompressionError(f"Codifica non supportata: {encoding}")
+
+    read = 0
+    written = 0
+    for data in chunks:
+        read += len(data)
+        for out in feed(data):
+            written += len(out)
+            yield out
+        if progress_callback:
+            progress_callback(read, written)
+    if not finished():
+        raise CompressionError(f"Dati {encoding} troncati dopo {read} byte")
+
+def file_chunks(path):
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+
+# ------------------------------------------------------------
+#                 COMPRESSIONE (per release_tools.py)
+# ------------------------------------------------------------
+def compress_file(source_path, target_path, encoding):
+    """
+    Comprime source_path in target_path leggendo e scrivendo a pezzi.
+    """
+    if encoding == "gzip":
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    elif encoding == "xz":
+        compressor = lzma.LZMACompressor(preset=9 | lzma.PRESET_EXTREME)
+    elif encoding == "zstd":
+        if zstandard is None:
+            raise CompressionError("Il pacchetto zstandard non è installato")
+        compressor = zstandard.ZstdCompressor(level=19).compressobj()
+    else:
+        raise CompressionError(f"Codifica non supportata: {encoding}")
+    with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+        for data in iter(lambda: src.read(CHUNK_SIZE), b""):
+            dst.write(compressor.compress(data))
+        dst.write(compressor.flush())
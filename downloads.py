@@ -0,0 +1,259 @@
+"""
+Download riprendibili, usati sia dall'installer (global.ini) sia dall'updater.
+
+Il file viene scritto in <destinazione>.part e accanto c'è un piccolo
+diario JSON (<destinazione>.part.json) con URL, validatore HTTP (ETag o
+Last-Modified) e byte già scaricati. Se la connessione cade, al tentativo
+successivo (anche in un'altra sessione, dopo aver chiuso il programma) il
+download riprende da dove si era fermato con una richiesta Range; se il
+server non supporta i Range, o il file online è cambiato, si riparte da
+zero. Le richieste passano dal client condiviso (http_client.py), con i
+suoi timeout di connessione e di lettura.
+
+Il contenuto viene verificato (hash SHA-256 calcolato durante il download,
+dimensione) prima di rinominare il parziale nella destinazione, quindi la
+destinazione non contiene mai un file troncato o corrotto.
+"""
+import os
+import json
+import time
+import base64
+import binascii
+import hashlib
+
+import http_client
+from http_client import DEFAULT_TIMEOUT, DEFAULT_RETRIES, RETRYABLE_STATUS
+from atomic_files import hash_file, replace_file
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+CHUNK_SIZE = 64 * 1024
+# Ogni quanti byte aggiornare il diario durante il download
+JOURNAL_INTERVAL = 1024 * 1024
+PART_SUFFIX = ".part"
+JOURNAL_SUFFIX = ".part.json"
+
+class DownloadError(Exception):
+    pass
+
+# ------------------------------------------------------------
+#                 DIARIO DEI DOWNLOAD PARZIALI
+# ------------------------------------------------------------
+def partial_paths(dest_path):
+    """
+    Restituisce (file parziale, diario) per la destinazione.
+    """
+    return dest_path + PART_SUFFIX, dest_path + JOURNAL_SUFFIX
+
+def load_journal(journal_path):
+    if not os.path.exists(journal_path):
+        return {}
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[DEBUG] Diario {journal_path} illeggibile ({e}), riparto da zero.")
+        return {}
+
+def save_journal(journal_path, journal):
+    tmp_path = journal_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(journal, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, journal_path)
+    except Exception as e:
+        print("[DEBUG] Errore salvando il diario del download:", e)
+
+def discard_partial(dest_path):
+    for path in partial_paths(dest_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _validator(journal):
+    return journal.get("etag") or journal.get("last_modified")
+
+def _resume_offset(url, part_path, journal):
+    """
+    Byte da cui riprendere, oppure 0 se il parziale non è riutilizzabile
+    (URL diverso, nessun validatore con cui chiedere If-Range).
+    """
+    if journal.get("url") != url or not _validator(journal):
+        return 0
+    try:
+        return os.path.getsize(part_path)
+    except OSError:
+        return 0
+
+def _content_range_start(response):
+    # Content-Range: bytes <inizio>-<fine>/<totale>
+    value = response.headers.get("Content-Range", "")
+    try:
+        return int(value.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        return None
+
+# ------------------------------------------------------------
+#                 VERIFICA DEL CONTENUTO
+# ------------------------------------------------------------
+def digest_from_headers(response):
+    """
+    SHA-256 (esadecimale) dell'intero file dichiarato dal server negli header
+    Repr-Digest (RFC 9530) o Digest (RFC 3230), oppure None. Entrambi
+    descrivono il file completo anche nelle risposte 206.
+    """
+    for header in ("Repr-Digest", "Digest"):
+        for item in response.headers.get(header, "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            if algorithm.lower() != "sha-256" or not value:
+                continue
+            try:
+                return base64.b64decode(value.strip(":")).hex()
+            except (ValueError, binascii.Error):
+                print(f"[DEBUG] Header {header} non valido: {value}")
+    return None
+
+def check_integrity(size, sha256, expected_size=None, expected_sha256=None):
+    if expected_size is not None and size != expected_size:
+        raise DownloadError(f"Dimensione errata: {size} byte invece di {expected_size}")
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        raise DownloadError(f"Hash errato: {sha256} invece di {expected_sha256}")
+
+# ------------------------------------------------------------
+#                 DOWNLOAD
+# ------------------------------------------------------------
+def _download_once(url, dest_path, headers, progress_callback, timeout, expected_sha256, expected_size):
+    part_path, journal_path = partial_paths(dest_path)
+    journal = load_journal(journal_path)
+    offset = _resume_offset(url, part_path, journal)
+
+    request_headers = dict(headers or {})
+    # Gli offset dei Range devono riferirsi ai byte del file, non a una versione compressa al volo
+    request_headers.setdefault("Accept-Encoding", "identity")
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+        request_headers["If-Range"] = _validator(journal)
+        # Stiamo completando un download già iniziato: una risposta 304 non avrebbe senso
+        request_headers.pop("If-None-Match", None)
+        request_headers.pop("If-Modified-Since", None)
+    print(f"[DEBUG] Download di {url} -> {dest_path} (riprendo da {offset} byte)")
+
+    digest = hashlib.sha256()
+    # I tentativi ripetuti li gestisce download_file, che così può riprendere dal parziale
+    with http_client.get(url, headers=request_headers, stream=True, timeout=timeout, retries=0) as response:
+        if response.status_code in RETRYABLE_STATUS:
+            raise DownloadError(f"Il server risponde {response.status_code}")
+        if response.status_code == 304:
+            return {"status": "not_modified", "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified")}
+        if response.status_code == 416 and offset and offset == journal.get("total"):
+            # Il parziale era già completo, mancava solo il rename finale
+            print("[DEBUG] Il parziale è già completo.")
+            mode = None
+        elif response.status_code == 206 and offset and _content_range_start(response) == offset:
+            etag = response.headers.get("ETag")
+            if etag and journal.get("etag") and etag != journal["etag"]:
+                # Il server ha ignorato If-Range: il parziale è di un'altra versione del file
+                discard_partial(dest_path)
+                raise DownloadError("Il file online è cambiato, riparto da zero")
+            print("[DEBUG] Il server supporta i Range: riprendo il download.")
+            mode = "ab"
+        else:
+            if response.status_code == 416:
+                discard_partial(dest_path)
+                raise DownloadError("Il server ha rifiutato la ripresa, riparto da zero")
+            response.raise_for_status()
+            if offset:
+                print(f"[DEBUG] Ripresa non possibile (status {response.status_code}), riparto da zero.")
+            offset = 0
+            mode = "wb"
+
+        if mode is None:
+            hash_file(part_path, digest)
+        else:
+            if mode == "ab":
+                # L'hash non si può salvare a metà: rileggo solo la parte già scaricata
+                hash_file(part_path, digest)
+            length = response.headers.get("Content-Length")
+            total = offset + int(length) if length else None
+            previous = journal if mode == "ab" else {}
+            journal = {
+                "url": url,
+                "etag": response.headers.get("ETag") or previous.get("etag"),
+                "last_modified": response.headers.get("Last-Modified") or previous.get("last_modified"),
+                "sha256": digest_from_headers(response) or previous.get("sha256"),
+                "total": total,
+                "bytes_done": offset,
+            }
+            save_journal(journal_path, journal)
+            done = offset
+            last_saved = done
+            try:
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        digest.update(chunk)
+                        done += len(chunk)
+                        if progress_callback:
+                            progress_callback(done, total)
+                        if done - last_saved >= JOURNAL_INTERVAL:
+                            journal["bytes_done"] = done
+                            save_journal(journal_path, journal)
+                            last_saved = done
+            finally:
+                journal["bytes_done"] = done
+                save_journal(journal_path, journal)
+            if total is not None and done != total:
+                # requests è già caricato dalla sessione (vedi http_client.get_session)
+                import requests
+                raise requests.exceptions.ChunkedEncodingError(f"Ricevuti {done} byte su {total}")
+
+    size = os.path.getsize(part_path)
+    sha256 = digest.hexdigest()
+    try:
+        check_integrity(size, sha256, expected_size if expected_size is not None else journal.get("total"),
+                        expected_sha256 or journal.get("sha256"))
+    except DownloadError:
+        discard_partial(dest_path)
+        raise
+    replace_file(part_path, dest_path)
+    discard_partial(dest_path)
+    return {"status": "downloaded", "etag": journal.get("etag"), "last_modified": journal.get("last_modified"),
+            "size": size, "sha256": sha256, "resumed": mode != "wb"}
+
+def download_file(url, dest_path, headers=None, progress_callback=None, timeout=DEFAULT_TIMEOUT,
+                  retries=DEFAULT_RETRIES, expected_sha256=None, expected_size=None):
+    """
+    Scarica url in dest_path passando da un file parziale riprendibile.
+
+    headers viene aggiunto alla richiesta (User-Agent, richieste condizionali);
+    progress_callback riceve (byte scaricati, byte totali o None). Se la
+    connessione cade il download viene ripreso fino a retries volte; il
+    parziale resta su disco e una chiamata successiva riparte da lì.
+
+    L'hash SHA-256 viene calcolato mentre i byte arrivano e confrontato con
+    expected_sha256 (o con quello dichiarato dal server negli header), la
+    dimensione con expected_size (o Content-Length). Solo se tutto torna il
+    parziale viene portato su disco e rinominato in dest_path.
+
+    Restituisce un dict con status ("downloaded" o "not_modified" se il server
+    risponde 304), etag, last_modified e, se scaricato, size, sha256 e resumed.
+    Solleva DownloadError o le eccezioni di requests se non ci riesce.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    attempt = 0
+    while True:
+        try:
+            return _download_once(url, dest_path, headers, progress_callback, timeout,
+                                  expected_sha256, expected_size)
+        except (DownloadError, *http_client.retryable_errors()) as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            delay = http_client.backoff_delay(attempt)
+            print(f"[DEBUG] Download interrotto ({e}), nuovo tentativo {attempt}/{retries} tra {delay:.1f}s.")
+            time.sleep(delay)
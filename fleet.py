@@ -0,0 +1,178 @@
+"""
+Installazione della traduzione su più macchine a partire da un manifest.
+
+Il manifest (JSON, o TOML se il file finisce in .toml) elenca le cartelle
+di gioco da aggiornare, percorsi locali o condivisioni di rete montate:
+
+    version = "1.2"          # facoltativo, etichetta riportata nel report
+    sha256 = "..."           # facoltativo, hash di global.ini richiesto
+    max_workers = 4          # installazioni in parallelo
+    force = false            # reinstalla anche dove è già aggiornata
+
+    [[targets]]
+    name = "pc-salotto"
+    path = '\\\\pc-salotto\\StarCitizen\\LIVE'
+
+(in JSON le stesse chiavi; un target può essere anche solo il percorso).
+
+Il file viene preso una sola volta nella cache (vedi payload_cache.py) e
+copiato in tutte le cartelle; quelle che hanno già la versione giusta
+vengono saltate. Con sha256 la versione richiesta deve essere in cache o
+essere quella online. Il risultato è un report JSON con esito e tempi di
+ogni cartella.
+"""
+import os
+import json
+import time
+import concurrent.futures
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+from atomic_files import atomic_write
+from translation import fetch_payload, install_payload, translation_status
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+DEFAULT_MAX_WORKERS = 4
+
+class ManifestError(Exception):
+    pass
+
+class PayloadMismatchError(Exception):
+    pass
+
+# ------------------------------------------------------------
+#                 MANIFEST
+# ------------------------------------------------------------
+def _read_manifest(path):
+    if path.lower().endswith(".toml"):
+        if tomllib is None:
+            raise ManifestError("Per i manifest TOML serve Python 3.11 o successivo")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_manifest(path):
+    """
+    Legge e controlla il manifest. Restituisce un dict con version, sha256,
+    max_workers, force e targets (lista di dict con name e path).
+    Solleva ManifestError se non è valido.
+    """
+    try:
+        data = _read_manifest(path)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Impossibile leggere {path}: {e}")
+    if not isinstance(data, dict):
+        raise ManifestError("Il manifest deve essere un oggetto con la chiave targets")
+
+    targets = []
+    for item in data.get("targets") or []:
+        if isinstance(item, str):
+            item = {"path": item}
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str) or not item["path"]:
+            raise ManifestError(f"Target non valido: {item!r}")
+        path = os.path.normpath(item["path"])
+        targets.append({"name": str(item.get("name") or os.path.basename(path)), "path": path})
+    if not targets:
+        raise ManifestError("Il manifest non contiene targets")
+
+    sha256 = data.get("sha256")
+    if sha256 is not None:
+        sha256 = str(sha256).lower()
+        if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+            raise ManifestError(f"sha256 non valido: {data['sha256']}")
+    max_workers = data.get("max_workers", DEFAULT_MAX_WORKERS)
+    if not isinstance(max_workers, int) or isinstance(max_workers, bool) or max_workers < 1:
+        raise ManifestError(f"max_workers non valido: {max_workers!r}")
+    return {
+        "version": data.get("version"),
+        "sha256": sha256,
+        "max_workers": max_workers,
+        "force": bool(data.get("force", False)),
+        "targets": targets,
+    }
+
+# ------------------------------------------------------------
+#                 INSTALLAZIONE
+# ------------------------------------------------------------
+def prepare_payload(cache, manifest, state_file=None):
+    """
+    Restituisce (sha256, scaricato) della versione da installare: quella
+    richiesta dal manifest se è già in cache, altrimenti quella online.
+    Solleva PayloadMismatchError se la versione online non è quella richiesta.
+    """
+    wanted = manifest["sha256"]
+    if wanted and cache.verify(wanted):
+        print(f"[DEBUG] Versione richiesta {wanted} già in cache.")
+        return wanted, False
+    sha256, downloaded = fetch_payload(cache, state_file,
+                                       base_folders=[target["path"] for target in manifest["targets"]])
+    if wanted and sha256 != wanted:
+        raise PayloadMismatchError(f"La versione online ({sha256}) non è quella richiesta ({wanted})")
+    return sha256, downloaded
+
+def install_target(target, cache, sha256, force=False):
+    """
+    Installa la versione sha256 in una cartella, saltandola se è già
+    aggiornata. Restituisce l'esito ("installed", "skipped" o "failed") con i tempi.
+    """
+    start = time.perf_counter()
+    result = dict(target, outcome="failed", message="", sha256_before=None)
+    try:
+        if not os.path.isdir(target["path"]):
+            result["message"] = "cartella non raggiungibile"
+        else:
+            status = translation_status(target["path"], sha256)
+            result["sha256_before"] = status["sha256"]
+            if not force and status["up_to_date"] and status["user_cfg"]:
+                result["outcome"] = "skipped"
+                result["message"] = "già aggiornata"
+            else:
+                install_payload(target["path"], cache, sha256)
+                result["outcome"] = "installed"
+                result["message"] = "aggiornata"
+    except Exception as e:
+        result["message"] = str(e)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    print(f"[DEBUG] {target['name']} ({target['path']}): {result['outcome']} {result['message']}")
+    return result
+
+def run_fleet(manifest, cache, state_file=None):
+    """
+    Prepara il file una volta e lo installa in tutti i target del manifest,
+    al massimo max_workers alla volta. Restituisce il report.
+    """
+    start = time.perf_counter()
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "version": manifest["version"],
+        "sha256": None,
+        "payload": {},
+        "totals": {"installed": 0, "skipped": 0, "failed": 0},
+        "targets": [],
+    }
+    try:
+        sha256, downloaded = prepare_payload(cache, manifest, state_file)
+        report["sha256"] = sha256
+        report["payload"] = {"downloaded": downloaded, "seconds": round(time.perf_counter() - start, 3)}
+    except Exception as e:
+        report["payload"] = {"error": str(e), "seconds": round(time.perf_counter() - start, 3)}
+        report["targets"] = [dict(target, outcome="failed", message="file della traduzione non disponibile",
+                                  sha256_before=None, seconds=0.0) for target in manifest["targets"]]
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=manifest["max_workers"]) as executor:
+            # map mantiene l'ordine del manifest nel report
+            report["targets"] = list(executor.map(
+                lambda target: install_target(target, cache, sha256, manifest["force"]), manifest["targets"]))
+    for result in report["targets"]:
+        report["totals"][result["outcome"]] += 1
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+def write_report(path, report):
+    atomic_write(path, json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,166 @@
+"""
+Client HTTP condiviso da installer e updater.
+
+Tutte le richieste passano da una sola requests.Session, così le
+connessioni verso Google Drive e mrrevo.it restano aperte (keep-alive) e
+non si rifà l'handshake TCP+TLS a ogni chiamata. Qui stanno anche la
+politica dei timeout, i tentativi ripetuti con backoff esponenziale e
+jitter sugli errori transitori e le statistiche sui tempi di ogni richiesta.
+requests viene importato alla prima richiesta e non all'import del modulo,
+così l'installer non ne paga il costo prima di mostrare lo splash.
+"""
+import time
+import random
+import threading
+import collections
+from urllib.parse import urlsplit
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 10
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+STATS_LIMIT = 200
+
+# Risposte del server dopo le quali ha senso riprovare (per gli errori vedi retryable_errors)
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_stats = collections.deque(maxlen=STATS_LIMIT)
+_stats_lock = threading.Lock()
+
+# ------------------------------------------------------------
+#                 SESSIONE CONDIVISA
+# ------------------------------------------------------------
+def get_session():
+    """
+    Restituisce la sessione condivisa, creandola alla prima chiamata.
+    requests.Session si può usare da più thread per richieste indipendenti.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def retryable_errors():
+    """
+    Errori di rete dopo i quali ha senso riprovare.
+    """
+    import requests
+    return (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Attesa prima del tentativo numero attempt (da 1): backoff esponenziale
+    con jitter completo, oppure il Retry-After del server se indicato.
+    """
+    if retry_after is not None:
+        return min(BACKOFF_MAX, retry_after)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+# ------------------------------------------------------------
+#                 RICHIESTE
+# ------------------------------------------------------------
+def request(method, url, retries=DEFAULT_RETRIES, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Esegue la richiesta con la sessione condivisa. Gli errori di rete e le
+    risposte 429/5xx vengono ritentati fino a retries volte; alla fine
+    restituisce l'ultima risposta o solleva l'ultima eccezione di requests.
+    Con stream=True il tempo registrato è quello fino agli header.
+    """
+    session = get_session()
+    errors = retryable_errors()
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except errors as e:
+            _record(method, url, None, time.perf_counter() - start, attempt, error=e)
+            attempt += 1
+            if attempt > retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"[DEBUG] {method} {url} fallita ({e}), nuovo tentativo {attempt}/{retries} tra {delay:.1f}s.")
+            time.sleep(delay)
+            continue
+        _record(method, url, response.status_code, time.perf_counter() - start, attempt)
+        if response.status_code in RETRYABLE_STATUS and attempt < retries:
+            attempt += 1
+            delay = backoff_delay(attempt, _retry_after(response))
+            print(f"[DEBUG] {method} {url} -> {response.status_code}, nuovo tentativo {attempt}/{retries} tra {delay:.1f}s.")
+            response.close()
+            time.sleep(delay)
+            continue
+        return response
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+# ------------------------------------------------------------
+#                 STATISTICHE
+# ------------------------------------------------------------
+def _record(method, url, status, elapsed, attempt, error=None):
+    with _stats_lock:
+        _stats.append({
+            "method": method,
+            "host": urlsplit(url).netloc,
+            "url": url,
+            "status": status,
+            "elapsed": elapsed,
+            "attempt": attempt,
+            "error": repr(error) if error else None,
+        })
+
+def request_stats():
+    """
+    Copia delle ultime richieste registrate (al massimo STATS_LIMIT).
+    """
+    with _stats_lock:
+        return list(_stats)
+
+def stats_summary():
+    """
+    Per ogni host: richieste, errori, tentativi ripetuti, tempo medio e massimo.
+    """
+    summary = {}
+    for entry in request_stats():
+        host = summary.setdefault(entry["host"], {"requests": 0, "errors": 0, "retries": 0,
+                                                  "total_time": 0.0, "max_time": 0.0})
+        host["requests"] += 1
+        host["errors"] += entry["status"] is None or entry["status"] >= 400
+        host["retries"] += entry["attempt"] > 0
+        host["total_time"] += entry["elapsed"]
+        host["max_time"] = max(host["max_time"], entry["elapsed"])
+    for host in summary.values():
+        host["avg_time"] = host["total_time"] / host["requests"]
+    return summary
+
+def log_stats(prefix="[DEBUG]"):
+    for host, s in stats_summary().items():
+        print(f"{prefix} HTTP {host}: {s['requests']} richieste, {s['errors']} errori, {s['retries']} ripetute, "
+              f"media {s['avg_time'] * 1000:.0f} ms, max {s['max_time'] * 1000:.0f} ms")
@@ -0,0 +1,170 @@
+"""
+Aggiornamenti differenziali di global.ini, chiave per chiave.
+
+global.ini è un elenco di righe chiave=valore e ogni versione della
+traduzione ne cambia una piccola parte. Un delta descrive, rispetto a una
+versione di base identificata dal suo hash, le righe cambiate, quelle
+rimosse e quelle aggiunte (con la chiave dopo cui inserirle); l'installer
+lo applica leggendo la base riga per riga, senza caricarla in memoria.
+
+Formato del delta (JSON):
+    {
+        "format": 1,
+        "base_sha256": "...", "target_sha256": "...", "target_size": 123,
+        "set": {"chiave": "chiave=nuovo valore\\r\\n", ...},
+        "remove": ["chiave", ...],
+        "add": [["chiave precedente o null", "chiave=valore\\r\\n"], ...]
+    }
+Le righe sono salvate complete di fine riga, così il risultato è identico
+byte per byte al file di destinazione.
+"""
+import os
+import json
+import difflib
+import hashlib
+
+from atomic_files import hash_file
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+DELTA_FORMAT = 1
+ENCODING = "utf-8"
+# Mantiene i byte non UTF-8 così come sono, sia in lettura sia nel JSON del delta
+ERRORS = "surrogateescape"
+
+class DeltaError(Exception):
+    pass
+
+# ------------------------------------------------------------
+#                 LETTURA DELLE RIGHE
+# ------------------------------------------------------------
+def line_key(line):
+    """
+    Chiave della riga chiave=valore, oppure None per righe senza '=' (vuote, commenti).
+    """
+    if "=" not in line:
+        return None
+    return line.split("=", 1)[0]
+
+def iter_lines(path):
+    """
+    Righe del file con il loro fine riga originale, lette una alla volta.
+    """
+    with open(path, "r", encoding=ENCODING, errors=ERRORS, newline="") as f:
+        yield from f
+
+def encode_line(line):
+    return line.encode(ENCODING, ERRORS)
+
+# ------------------------------------------------------------
+#                 APPLICAZIONE DEL DELTA
+# ------------------------------------------------------------
+def load_delta(path):
+    with open(path, "r", encoding="utf-8") as f:
+        delta = json.load(f)
+    if delta.get("format") != DELTA_FORMAT:
+        raise DeltaError(f"Formato del delta non supportato: {delta.get('format')}")
+    return delta
+
+def apply_delta(base_lines, delta):
+    """
+    Genera le righe della versione di destinazione a partire dalle righe
+    della base (un iterabile, consumato una riga alla volta).
+    """
+    remove = set(delta["remove"])
+    changed = delta["set"]
+    adds = {}
+    for after, line in delta["add"]:
+        adds.setdefault(after, []).append(line)
+
+    def added_after(key):
+        # Le righe aggiunte possono seguire altre righe aggiunte: visita in profondità senza ricorsione
+        stack = [iter(adds.pop(key, ()))]
+        while stack:
+            line = next(stack[-1], None)
+            if line is None:
+                stack.pop()
+                continue
+            yield line
+            new_key = line_key(line)
+            if new_key in adds:
+                stack.append(iter(adds.pop(new_key)))
+
+    yield from added_after(None)
+    for line in base_lines:
+        key = line_key(line)
+        if key is None:
+            yield line
+            continue
+        if key in remove:
+            continue
+        yield changed.get(key, line)
+        yield from added_after(key)
+
+def merge_chunks(base_path, delta):
+    """
+    Byte della versione di destinazione, pronti per PayloadCache.add_stream.
+    """
+    for line in apply_delta(iter_lines(base_path), delta):
+        yield encode_line(line)
+
+# ------------------------------------------------------------
+#                 GENERAZIONE DEL DELTA
+# ------------------------------------------------------------
+def _token(line):
+    # Le righe senza chiave vengono confrontate per contenuto
+    key = line_key(line)
+    return ("", line) if key is None else key
+
+def make_delta(base_path, target_path):
+    """
+    Costruisce il delta da base_path a target_path e lo verifica
+    applicandolo. Solleva DeltaError se le differenze non si possono
+    esprimere chiave per chiave (ad esempio righe senza chiave cambiate):
+    in quel caso si pubblica solo il file completo.
+    """
+    base_lines = list(iter_lines(base_path))
+    target_lines = list(iter_lines(target_path))
+    base_tokens = [_token(line) for line in base_lines]
+    target_tokens = [_token(line) for line in target_lines]
+
+    matcher = difflib.SequenceMatcher(None, base_tokens, target_tokens, autojunk=False)
+    # Indice nella destinazione -> indice nella base, per le righe rimaste al loro posto
+    matched = {}
+    for block in matcher.get_matching_blocks():
+        for offset in range(block.size):
+            matched[block.b + offset] = block.a + offset
+    kept_base = set(matched.values())
+
+    changed, remove, add = {}, [], []
+    for i, line in enumerate(base_lines):
+        if i not in kept_base and line_key(line) is not None:
+            remove.append(line_key(line))
+    previous_key = None
+    for j, line in enumerate(target_lines):
+        if j in matched:
+            if line_key(line) is not None and line != base_lines[matched[j]]:
+                changed[line_key(line)] = line
+        else:
+            add.append([previous_key, line])
+        if line_key(line) is not None:
+            previous_key = line_key(line)
+
+    base_sha256 = hash_file(base_path).hexdigest()
+    target_sha256 = hash_file(target_path).hexdigest()
+    delta = {
+        "format": DELTA_FORMAT,
+        "base_sha256": base_sha256,
+        "target_sha256": target_sha256,
+        "target_size": os.path.getsize(target_path),
+        "set": changed,
+        "remove": remove,
+        "add": add,
+    }
+    digest = hashlib.sha256()
+    for line in apply_delta(base_lines, delta):
+        digest.update(encode_line(line))
+    if digest.hexdigest() != target_sha256:
+        raise DeltaError("Le differenze non si possono esprimere chiave per chiave")
+    return delta
@@ -0,0 +1,258 @@
+"""
+Installer della traduzione da riga di comando, senza interfaccia grafica.
+
+Usa la stessa logica dell'installer grafico (scanner.py, translation.py,
+payload_cache.py e i file in %LOCALAPPDATA%\\InstallerTraduzioneMRREVO) ma
+non importa Qt, quindi parte in una frazione del tempo e si può usare in
+uno script.
+
+    python installer_cli.py scan [--rescan]
+        cerca le installazioni di Star Citizen
+    python installer_cli.py install (--target CARTELLA [...] | --all)
+        installa la traduzione nelle cartelle indicate o in tutte quelle trovate
+    python installer_cli.py remove (--target CARTELLA [...] | --all)
+        rimuove la traduzione
+    python installer_cli.py status [--target CARTELLA ...] [--online]
+        mostra lo stato della traduzione in ogni installazione
+    python installer_cli.py verify [--target CARTELLA ...] [--online]
+        controlla che ogni installazione abbia l'ultima versione scaricata
+    python installer_cli.py fleet MANIFEST [--report FILE]
+        installa in tutte le cartelle elencate nel manifest (vedi fleet.py);
+        se il report non si può scrivere resta su stdout e l'uscita è 1
+
+Senza --target status e verify usano le installazioni trovate dalla
+ricerca; con --online prima controllano (e se serve scaricano) la versione
+online, altrimenti confrontano con l'ultima versione scaricata.
+
+Il risultato viene scritto su stdout in JSON; i messaggi di debug vanno su
+stderr (o da nessuna parte con --quiet). Codici di uscita: 0 riuscito,
+1 operazione fallita su almeno una cartella, 2 argomenti non validi,
+3 nessuna installazione trovata.
+"""
+import io
+import os
+import sys
+import json
+import argparse
+import contextlib
+
+from app_paths import DISCOVERY_INDEX_FILE, PAYLOAD_STATE_FILE, PAYLOAD_CACHE_FOLDER, ensure_settings_folder
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NOT_FOUND = 3
+
+# ------------------------------------------------------------
+#                 CARTELLE DI DESTINAZIONE
+# ------------------------------------------------------------
+def discover(force_rescan=False):
+    """
+    Cerca le installazioni come la ricerca automatica dell'installer grafico
+    (usando e aggiornando lo stesso indice). Restituisce (installazioni, riepilogo).
+    """
+    from scanner import DiscoveryIndex, scan_installations
+    ensure_settings_folder()
+    index = DiscoveryIndex(DISCOVERY_INDEX_FILE)
+    folders = []
+    summary = {}
+    for kind, payload in scan_installations(index=index, force_rescan=force_rescan):
+        if kind == "found":
+            folders.append(payload)
+        elif kind == "done":
+            summary = payload
+    return folders, summary
+
+def resolve_targets(args):
+    """
+    Le cartelle indicate con --target (come la selezione manuale, basta che
+    esistano), altrimenti quelle trovate dalla ricerca.
+    Restituisce (cartelle, cartelle inesistenti).
+    """
+    if not args.target:
+        folders, _ = discover()
+        return folders, []
+    folders, missing = [], []
+    for target in args.target:
+        path = os.path.abspath(target)
+        if os.path.isdir(path):
+            folders.append((os.path.basename(os.path.normpath(path)), path))
+        else:
+            missing.append(path)
+    return folders, missing
+
+def open_cache():
+    from payload_cache import PayloadCache
+    ensure_settings_folder()
+    return PayloadCache(PAYLOAD_CACHE_FOLDER)
+
+def expected_sha256(folders, online):
+    """
+    Versione con cui confrontare le installazioni: con online quella
+    pubblicata (scaricandola in cache se serve), altrimenti l'ultima scaricata.
+    """
+    from translation import fetch_payload, latest_payload_sha256
+    if online:
+        sha256, _ = fetch_payload(open_cache(), PAYLOAD_STATE_FILE, base_folders=[path for _, path in folders])
+        return sha256
+    return latest_payload_sha256(PAYLOAD_STATE_FILE)
+
+def missing_results(missing):
+    return [{"path": path, "ok": False, "message": "cartella inesistente"} for path in missing]
+
+# ------------------------------------------------------------
+#                 COMANDI
+# ------------------------------------------------------------
+def cmd_scan(args):
+    folders, summary = discover(force_rescan=args.rescan)
+    result = {
+        "installations": [{"name": name, "path": path} for name, path in folders],
+        "summary": summary,
+    }
+    return (EXIT_OK if folders else EXIT_NOT_FOUND), result
+
+def cmd_install(args):
+    from translation import install_translation_many
+    folders, missing = resolve_targets(args)
+    if not folders and not missing:
+        return EXIT_NOT_FOUND, {"targets": []}
+    targets = missing_results(missing)
+    if folders:
+        try:
+            results = install_translation_many(folders, open_cache(), PAYLOAD_STATE_FILE)
+        except Exception as e:
+            return EXIT_FAILED, {"error": str(e), "targets": targets}
+        targets += [{"name": name, "path": path, "ok": results[path][0], "message": results[path][1]}
+                    for name, path in folders]
+    ok = all(target["ok"] for target in targets)
+    return (EXIT_OK if ok else EXIT_FAILED), {"targets": targets}
+
+def cmd_remove(args):
+    from translation import remove_translation
+    folders, missing = resolve_targets(args)
+    if not folders and not missing:
+        return EXIT_NOT_FOUND, {"targets": []}
+    targets = missing_results(missing)
+    for name, path in folders:
+        try:
+            removed = remove_translation(path)
+            targets.append({"name": name, "path": path, "ok": True,
+                            "message": "rimossa" if removed else "non installata"})
+        except OSError as e:
+            targets.append({"name": name, "path": path, "ok": False, "message": str(e)})
+    ok = all(target["ok"] for target in targets)
+    return (EXIT_OK if ok else EXIT_FAILED), {"targets": targets}
+
+def collect_status(args):
+    from translation import translation_status
+    folders, missing = resolve_targets(args)
+    try:
+        sha256 = expected_sha256(folders, args.online)
+    except Exception as e:
+        return None, None, missing, str(e)
+    installations = []
+    for name, path in folders:
+        status = translation_status(path, sha256)
+        status["name"] = name
+        installations.append(status)
+    return sha256, installations, missing, None
+
+def cmd_status(args):
+    sha256, installations, missing, error = collect_status(args)
+    if error:
+        return EXIT_FAILED, {"error": error}
+    result = {"latest_sha256": sha256, "installations": installations, "missing": missing}
+    if missing:
+        return EXIT_FAILED, result
+    return (EXIT_OK if installations else EXIT_NOT_FOUND), result
+
+def cmd_verify(args):
+    sha256, installations, missing, error = collect_status(args)
+    if error:
+        return EXIT_FAILED, {"error": error}
+    if sha256 is None:
+        return EXIT_FAILED, {"error": "nessuna versione scaricata con cui confrontare, usare --online",
+                             "installations": installations}
+    for status in installations:
+        problems = []
+        if not status["installed"]:
+            problems.append("global.ini mancante")
+        elif not status["up_to_date"]:
+            problems.append("global.ini diverso dalla versione attesa")
+        if not status["user_cfg"]:
+            problems.append("user.cfg non configurato")
+        status["ok"] = not problems
+        status["problems"] = problems
+    result = {"latest_sha256": sha256, "installations": installations, "missing": missing}
+    if not installations and not missing:
+        return EXIT_NOT_FOUND, result
+    ok = not missing and all(status["ok"] for status in installations)
+    return (EXIT_OK if ok else EXIT_FAILED), result
+
+def cmd_fleet(args):
+    from fleet import ManifestError, load_manifest, run_fleet, write_report
+    try:
+        manifest = load_manifest(args.manifest)
+    except ManifestError as e:
+        return EXIT_USAGE, {"error": str(e)}
+    report = run_fleet(manifest, open_cache(), PAYLOAD_STATE_FILE)
+    if args.report:
+        try:
+            write_report(args.report, report)
+        except (OSError, ValueError) as e:
+            # Il report resta comunque su stdout: l'installazione è già stata fatta
+            report["report_error"] = f"Impossibile scrivere {args.report}: {e}"
+            return EXIT_FAILED, report
+    return (EXIT_FAILED if report["totals"]["failed"] else EXIT_OK), report
+
+# ------------------------------------------------------------
+#                 MAIN
+# ------------------------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Installer della traduzione italiana di Star Citizen (senza interfaccia)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Non scrivere i messaggi di debug su stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="Cerca le installazioni di Star Citizen")
+    scan.add_argument("--rescan", action="store_true", help="Ricerca completa su tutti i dischi")
+    scan.set_defaults(func=cmd_scan)
+
+    for name, func, help_text in (("install", cmd_install, "Installa la traduzione"),
+                                  ("remove", cmd_remove, "Rimuove la traduzione")):
+        command = commands.add_parser(name, help=help_text)
+        targets = command.add_mutually_exclusive_group(required=True)
+        targets.add_argument("--target", action="append", metavar="CARTELLA",
+                             help="Cartella di installazione (ripetibile)")
+        targets.add_argument("--all", action="store_true", help="Tutte le installazioni trovate dalla ricerca")
+        command.set_defaults(func=func)
+
+    for name, func, help_text in (("status", cmd_status, "Mostra lo stato della traduzione"),
+                                  ("verify", cmd_verify, "Controlla che la traduzione sia aggiornata e integra")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--target", action="append", metavar="CARTELLA",
+                             help="Cartella di installazione (ripetibile, di default quelle trovate)")
+        command.add_argument("--online", action="store_true",
+                             help="Confronta con la versione online invece che con l'ultima scaricata")
+        command.set_defaults(func=func)
+
+    fleet = commands.add_parser("fleet", help="Installa in tutte le cartelle elencate in un manifest")
+    fleet.add_argument("manifest", help="Manifest JSON o TOML con le cartelle da aggiornare")
+    fleet.add_argument("--report", metavar="FILE", help="Scrive il report JSON anche in questo file")
+    fleet.set_defaults(func=cmd_fleet)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    log = io.StringIO() if args.quiet else sys.stderr
+    # I moduli condivisi con l'installer grafico stampano su stdout: qui stdout è riservato al JSON
+    with contextlib.redirect_stdout(log):
+        code, result = args.func(args)
+    result = {"command": args.command, "ok": code == EXIT_OK, **result}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
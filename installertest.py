@@ -1,28 +1,35 @@
+# Va importato per primo: il suo import è il tempo zero dei tempi di avvio
+import startup_profile
 import sys
 import os
-import json
-import requests
-import concurrent.futures
-import tempfile
-import subprocess
-import winreg  # Per avvio automatico su Windows
-import shutil   # Per copiare il file in una cartella stabile
+import threading
+startup_profile.mark("import librerie standard")
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QCheckBox, QDialog,
     QDialogButtonBox, QMessageBox, QProgressBar, QFileDialog, QLineEdit, QHBoxLayout,
     QPushButton, QStyleOptionButton, QStyle, QSizePolicy, QSplashScreen
 )
-from PyQt5.QtGui import QIcon, QFont, QPainter, QPixmap, QDesktopServices
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QPoint
+from PyQt5.QtGui import QIcon, QFont, QPainter, QPixmap, QImage, QDesktopServices
+from PyQt5.QtCore import Qt, QTimer, QThread, QObject, pyqtSignal, QPoint
+startup_profile.mark("import PyQt5")
+
+# I moduli pesanti (requests, scanner, translation, winreg) vengono importati
+# solo quando servono: requests alla prima richiesta (vedi http_client.py),
+# scanner all'avvio della ricerca, translation e payload_cache all'installazione,
+# winreg quando si cambia l'avvio automatico.
+import http_client
+from app_paths import (
+    SETTINGS_FILE, DISCOVERY_INDEX_FILE, PAYLOAD_STATE_FILE, PAYLOAD_CACHE_FOLDER, METADATA_CACHE_FILE,
+    settings_path, ensure_settings_folder
+)
+from splash_cache import SplashCache, prepare_image
+from metadata_cache import MetadataCache
+from settings_store import SettingsStore
+startup_profile.mark("import moduli dell'installer")
 
 # ------------------------------------------------------------
 #                 CONFIGURAZIONE & COSTANTI
 # ------------------------------------------------------------
-SETTINGS_FOLDER = os.path.join(os.getenv('LOCALAPPDATA'), "InstallerTraduzioneMRREVO")
-if not os.path.exists(SETTINGS_FOLDER):
-    os.makedirs(SETTINGS_FOLDER)
-
-SETTINGS_FILE = os.path.join(SETTINGS_FOLDER, "settings.json")
 
 LAUNCHER_VERSION = "1.4"
 CURRENT_TRANSLATION_VERSION = "1"
@@ -30,6 +37,10 @@ SPLASH_IMAGE_URL = "https://drive.google.com/uc?export=download&id=1v4gxwj8XoRyK
 VERSION_FILE_URL = "https://drive.google.com/uc?export=download&id=1cXpbauWp5JnZYQaUS0Sh--tzqtVXpHpW"
 
 STATIC_SPLASH_FILENAME = "static_splash.png"
+SPLASH_CACHE_FOLDER = settings_path("splash_cache")
+# Lato massimo dello splash e frazione massima dello schermo che può occupare
+SPLASH_MAX_SIDE = 1000
+SPLASH_SCREEN_FRACTION = 0.7
 
 # ------------------------------------------------------------
 #   FUNZIONI PER LA POSIZIONE STABILE DELL'UPDATER
@@ -56,9 +67,11 @@ def ensure_stable_location():
     current_path = os.path.abspath(sys.argv[0])
     # Confronto case-insensitive su Windows
     if current_path.lower() != stable_path.lower():
+        from atomic_files import sync_file
         try:
-            shutil.copy2(current_path, stable_path)
-            print(f"[DEBUG] Copia eseguita: aggiornato l'updater in posizione stabile: {stable_path}")
+            # Se la copia stabile è già identica non si riscrive (vedi sync_file)
+            outcome = sync_file(current_path, stable_path)
+            print(f"[DEBUG] Updater in posizione stabile ({outcome}): {stable_path}")
         except Exception as e:
             print("[DEBUG] Errore copiando l'updater nella posizione stabile:", e)
     else:
@@ -79,40 +92,6 @@ class NoFocusButton(QPushButton):
         painter = QPainter(self)
         self.style().drawControl(QStyle.CE_PushButton, option, painter, self)
 
-# ------------------------------------------------------------
-#         LETTURA E SCRITTURA DELLE IMPOSTAZIONI (JSON)
-# ------------------------------------------------------------
-def load_settings():
-    print("[DEBUG] load_settings() chiamato.")
-    default_settings = {
-        "start_with_windows": False,
-        "use_dynamic_splash": True,
-        "installed_translation_version": "",
-        "last_selected_folder": ""
-    }
-    if not os.path.exists(SETTINGS_FILE):
-        print("[DEBUG] Nessun file settings.json, uso impostazioni di default.")
-        return default_settings
-    try:
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for key in default_settings:
-            if key not in data:
-                data[key] = default_settings[key]
-        print("[DEBUG] Impostazioni caricate correttamente:", data)
-        return data
-    except Exception as e:
-        print(f"[DEBUG] Errore leggendo {SETTINGS_FILE}: {e}. Uso default.")
-        return default_settings
-
-def save_settings(settings):
-    print(f"[DEBUG] save_settings() - Salvo impostazioni: {settings}")
-    try:
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(settings, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print("[DEBUG] Errore salvando settings.json:", e)
-
 # ------------------------------------------------------------
 #      GESTIONE AVVIO AUTOMATICO SU WINDOWS (winreg)
 # ------------------------------------------------------------
@@ -121,6 +100,7 @@ def set_autostart_in_registry(enabled, target_executable):
     Registra (o elimina) nel registro il percorso target_executable per l’avvio automatico.
     In questo modo, se enabled è True, verrà avviato lo stable updater.
     """
+    import winreg
     run_key_name = "MyLauncherExample"
     reg_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
     print(f"[DEBUG] set_autostart_in_registry({enabled}) con target: {target_executable}")
@@ -155,110 +135,112 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def check_translation_version():
+def check_translation_version(metadata, on_update=None):
+    """
+    Versione online della traduzione, dalla cache dei metadati se è ancora
+    valida (vedi metadata_cache.py). Se era scaduta on_update riceve la
+    versione aggiornata quando il controllo in background la trova cambiata.
+    """
     print("[DEBUG] check_translation_version() chiamato.")
-    try:
-        response = requests.get(VERSION_FILE_URL, stream=True, timeout=10)
-        if response.status_code == 200:
-            version_str = response.text.strip()
-            print("[DEBUG] Versione online:", version_str)
-            return version_str
-    except Exception as e:
-        print("[DEBUG] Errore nel controllo versione:", e)
-    return CURRENT_TRANSLATION_VERSION
-
-def download_splash_image(url):
-    print("[DEBUG] download_splash_image() chiamato.")
-    try:
-        response = requests.get(url, stream=True, timeout=10)
-        if response.status_code == 200:
-            data = response.content
-            pixmap = QPixmap()
-            if pixmap.loadFromData(data):
-                print("[DEBUG] Splash scaricato correttamente.")
-                return pixmap
-    except Exception as e:
-        print("[DEBUG] Errore scaricando lo splash:", e)
-    return None
-
-def find_star_citizen_installations(progress_callback=None):
-    print("[DEBUG] find_star_citizen_installations() avviato.")
-    valid_folders = []
-    def search_drive(drive):
-        folders = []
-        try:
-            for root, dirs, files in os.walk(drive):
-                if 'StarCitizen' in root and 'Data.p4k' in files:
-                    folder_name = os.path.basename(root)
-                    folders.append((folder_name, root))
-        except Exception as e:
-            print(f"[DEBUG] Errore nella ricerca sul drive {drive}:", e)
-        return folders
-    drives = ['A:\\','B:\\','C:\\','D:\\','E:\\','F:\\','G:\\','H:\\']
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_to_drive = {executor.submit(search_drive, drive): drive for drive in drives}
-        for future in concurrent.futures.as_completed(future_to_drive):
-            result = future.result()
-            valid_folders.extend(result)
-    print("[DEBUG] Cartelle StarCitizen trovate:", valid_folders)
-    return valid_folders
+    value, source = metadata.get(VERSION_FILE_URL,
+                                 on_update=lambda value: on_update(value.strip()) if on_update else None)
+    if value is None or not value.strip():
+        print("[DEBUG] Versione online non disponibile, uso", CURRENT_TRANSLATION_VERSION)
+        return CURRENT_TRANSLATION_VERSION
+    version_str = value.strip()
+    print(f"[DEBUG] Versione online: {version_str} ({source})")
+    return version_str
 
 # ------------------------------------------------------------
 #                   THREAD
 # ------------------------------------------------------------
 class DownloadThread(QThread):
     progress_signal = pyqtSignal(int)
-    finished_signal = pyqtSignal(bool)
-    def __init__(self, folder, parent=None):
+    transfer_signal = pyqtSignal(dict)
+    folder_signal = pyqtSignal(str, str, str)
+    finished_signal = pyqtSignal(bool, dict)
+    def __init__(self, folders, cache, parent=None):
         super().__init__(parent)
-        self.folder = folder
+        self.folders = folders
+        self.cache = cache
     def run(self):
-        folder_name, folder_path = self.folder
-        print(f"[DEBUG] DownloadThread avviato su {folder_name} -> {folder_path}")
-        file_url = "https://drive.google.com/uc?export=download&id=1nS6AvSXgctANr-enrFg5XkZVUdY4N5qH"
-        data_folder = os.path.join(folder_path, "data", "Localization", "italian_(italy)")
-        os.makedirs(data_folder, exist_ok=True)
-        save_path = os.path.join(data_folder, "global.ini")
+        print(f"[DEBUG] DownloadThread avviato su {len(self.folders)} cartelle: {self.folders}")
         try:
-            response = requests.get(file_url, stream=True)
-            total_length = response.headers.get('content-length')
-            if total_length is None:
-                with open(save_path, 'wb') as f:
-                    f.write(response.content)
-                self.progress_signal.emit(100)
-            else:
-                dl = 0
-                total_length = int(total_length)
-                with open(save_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            dl += len(chunk)
-                            percent = int(dl * 100 / total_length)
-                            self.progress_signal.emit(percent)
-            config_path = os.path.join(folder_path, "user.cfg")
-            with open(config_path, 'w') as cfg_file:
-                cfg_file.write("g_language=italian_(italy)\n")
-                cfg_file.write("g_LanguageAudio=english\n")
-            print("[DEBUG] Download + scrittura configurazione completati con successo!")
-            self.finished_signal.emit(True)
+            from translation import install_translation_many
+            results = install_translation_many(self.folders, self.cache, PAYLOAD_STATE_FILE,
+                                               self.progress_signal.emit, self.folder_signal.emit,
+                                               transfer_callback=self.transfer_signal.emit)
         except Exception as e:
             print("[DEBUG] Errore durante il download:", e)
-            self.finished_signal.emit(False)
+            self.finished_signal.emit(False, {})
+            return
+        self.finished_signal.emit(all(ok for ok, _ in results.values()), results)
 
 class ProgressThread(QThread):
     progress_signal = pyqtSignal(int)
+    stats_signal = pyqtSignal(dict)
+    found_signal = pyqtSignal(str, str)
+    summary_signal = pyqtSignal(dict)
     result_signal = pyqtSignal(list)
+    def __init__(self, force_rescan=False, last_selected_folder=None, parent=None):
+        super().__init__(parent)
+        self.force_rescan = force_rescan
+        self.last_selected_folder = last_selected_folder
+        self.cancel_event = threading.Event()
+    def cancel(self):
+        print("[DEBUG] ProgressThread.cancel() - interrompo la ricerca.")
+        self.cancel_event.set()
     def run(self):
-        folders = find_star_citizen_installations(self.progress_signal)
+        # Percorsi noti e indice prima, la scansione dei drive solo se serve.
+        # Ogni installazione viene inviata alla UI appena trovata.
+        from scanner import DiscoveryIndex, scan_installations
+        ensure_settings_folder()
+        index = DiscoveryIndex(DISCOVERY_INDEX_FILE)
+        folders = []
+        for kind, payload in scan_installations(index=index, force_rescan=self.force_rescan,
+                                                last_selected_folder=self.last_selected_folder,
+                                                cancel_event=self.cancel_event):
+            if kind == "found":
+                folders.append(payload)
+                self.found_signal.emit(*payload)
+            elif kind == "progress":
+                self.progress_signal.emit(payload["percent"])
+                self.stats_signal.emit(payload)
+            else:
+                self.summary_signal.emit(payload)
+        print("[DEBUG] Cartelle StarCitizen trovate:", folders)
         self.result_signal.emit(folders)
 
 class VersionCheckThread(QThread):
     version_found = pyqtSignal(str)
+    # Emesso più tardi se la versione in cache era scaduta ed è cambiata
+    version_updated = pyqtSignal(str)
+    def __init__(self, metadata, parent=None):
+        super().__init__(parent)
+        self.metadata = metadata
     def run(self):
-        version_str = check_translation_version()
+        version_str = check_translation_version(self.metadata, self.version_updated.emit)
         self.version_found.emit(version_str)
 
+class SplashRefreshThread(QThread):
+    """
+    Aggiorna in background lo splash dinamico in cache (per questo avvio se
+    non ce n'era uno, altrimenti per il prossimo).
+    """
+    splash_found = pyqtSignal(QImage)
+    def __init__(self, cache, side, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.side = side
+    def run(self):
+        try:
+            image = self.cache.refresh("dynamic", SPLASH_IMAGE_URL, self.side, http_client.get)
+        except Exception as e:
+            print("[DEBUG] Errore aggiornando lo splash dinamico:", e)
+            return
+        if image is not None:
+            self.splash_found.emit(image)
+
 # ------------------------------------------------------------
 #                 FINESTRA "INFO"
 # ------------------------------------------------------------
@@ -539,17 +521,15 @@ class SettingsWindow(QDialog):
     def on_startup_changed(self, state):
         checked = (state == Qt.Checked)
         print("[DEBUG] on_startup_changed ->", checked)
-        self.settings["start_with_windows"] = checked
+        self.settings.set("start_with_windows", checked)
         # Ottieni il percorso stabile dell'updater (se non è già copiato, lo copia)
         updater_exe_path = ensure_stable_location()
         # Registra il target (l'updater stabile) per l'avvio automatico
         set_autostart_in_registry(checked, target_executable=updater_exe_path)
-        save_settings(self.settings)
     def on_splash_changed(self, state):
         checked = (state == Qt.Checked)
         print("[DEBUG] on_splash_changed ->", checked)
-        self.settings["use_dynamic_splash"] = checked
-        save_settings(self.settings)
+        self.settings.set("use_dynamic_splash", checked)
 
 # ------------------------------------------------------------
 #              FINESTRA WARNING (TERMINI E CONDIZIONI)
@@ -789,7 +769,7 @@ class FolderSelectionWindow(QWidget):
         content_layout.addLayout(self.image_layout)
         self.placeholder_label = QLabel(
             " -Premi 'Ricerca automatica' per cercare le versioni disponibili;\n"
-            "-Seleziona solo una versione alla volta;\n"
+            "-Puoi selezionare più versioni insieme;\n"
             "-Oppure seleziona manualmente il percorso di installazione;"
         )
         self.placeholder_label.setAlignment(Qt.AlignCenter)
@@ -808,21 +788,39 @@ class FolderSelectionWindow(QWidget):
         self.auto_progress_bar.setRange(0,100)
         self.auto_progress_bar.hide()
         content_layout.addWidget(self.auto_progress_bar)
+        self.cancel_search_button = QPushButton("Interrompi ricerca")
+        self.cancel_search_button.setStyleSheet("""
+            QPushButton {
+                background-color:#34495e;
+                color:white;
+                border:none;
+                font-size:16px;
+                border-radius:0px;
+                padding:5px 15px;
+            }
+            QPushButton:hover {
+                background-color:#555;
+            }
+        """)
+        self.cancel_search_button.clicked.connect(self.cancel_auto_search)
+        self.cancel_search_button.hide()
+        content_layout.addWidget(self.cancel_search_button)
+        self.search_thread = None
+        self.last_search_summary = None
         self.download_progress_bar = QProgressBar()
         self.download_progress_bar.setRange(0,100)
         self.download_progress_bar.hide()
         content_layout.addWidget(self.download_progress_bar)
-        installed_ver = self.settings.get("installed_translation_version", "")
-        if installed_ver:
-            self.installed_label = QLabel(f"Versione installata {installed_ver}")
-            self.installed_label.setAlignment(Qt.AlignCenter)
-            self.installed_label.setStyleSheet("color: yellow; font-size:18px;")
-            content_layout.addWidget(self.installed_label)
-        if self.online_version and self.online_version != installed_ver:
-            self.update_label = QLabel(f"Versione disponibile {self.online_version}")
-            self.update_label.setAlignment(Qt.AlignCenter)
-            self.update_label.setStyleSheet("color: yellow; font-size:18px;")
-            content_layout.addWidget(self.update_label)
+        self.installed_label = QLabel()
+        self.installed_label.setAlignment(Qt.AlignCenter)
+        self.installed_label.setStyleSheet("color: yellow; font-size:18px;")
+        content_layout.addWidget(self.installed_label)
+        self.update_label = QLabel()
+        self.update_label.setAlignment(Qt.AlignCenter)
+        self.update_label.setStyleSheet("color: yellow; font-size:18px;")
+        content_layout.addWidget(self.update_label)
+        self.set_online_version(self.online_version)
+        self.settings.subscribe(self.on_setting_changed)
         manual_layout = QHBoxLayout()
         self.manual_line = QLineEdit()
         self.manual_line.setPlaceholderText("Nessun percorso selezionato manualmente")
@@ -858,8 +856,27 @@ class FolderSelectionWindow(QWidget):
                 background-color:#9b59b6;
             }
         """)
-        auto_btn.clicked.connect(self.start_auto_search)
-        content_layout.addWidget(auto_btn)
+        auto_btn.clicked.connect(lambda: self.start_auto_search())
+        deep_btn = QPushButton("Ricerca completa")
+        deep_btn.setToolTip("Ignora i percorsi noti e le installazioni memorizzate e scansiona tutti i dischi")
+        deep_btn.setStyleSheet("""
+            QPushButton {
+                background-color:#34495e;
+                color:white;
+                border:none;
+                font-size:16px;
+                padding:10px 20px;
+                border-radius:0px;
+            }
+            QPushButton:hover {
+                background-color:#555;
+            }
+        """)
+        deep_btn.clicked.connect(lambda: self.start_auto_search(force_rescan=True))
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(auto_btn, 3)
+        search_layout.addWidget(deep_btn, 1)
+        content_layout.addLayout(search_layout)
         self.install_button = QPushButton("Installa traduzione")
         self.install_button.setStyleSheet("""
             QPushButton {
@@ -921,9 +938,6 @@ class FolderSelectionWindow(QWidget):
         content.setLayout(content_layout)
         main_layout.addWidget(content)
         self.setLayout(main_layout)
-        self.fake_progress = 0
-        self.fake_timer = QTimer(self)
-        self.fake_timer.timeout.connect(self.update_fake_progress)
         last_folder = self.settings.get("last_selected_folder", "")
         if last_folder:
             if os.path.exists(last_folder):
@@ -931,8 +945,7 @@ class FolderSelectionWindow(QWidget):
                 if not any(last_folder == p for _, p in self.valid_folders):
                     self.valid_folders.append((folder_name, last_folder))
             else:
-                self.settings["last_selected_folder"] = ""
-                save_settings(self.settings)
+                self.settings.set("last_selected_folder", "")
                 last_folder = ""
         if self.valid_folders:
             self.instruction_label.setText(
@@ -947,6 +960,19 @@ class FolderSelectionWindow(QWidget):
                     self.install_button.show()
                     self.remove_button.show()
                     break
+    def set_online_version(self, version):
+        # La versione può arrivare dopo l'apertura della finestra (controllo in background)
+        self.online_version = version
+        self.update_version_labels()
+    def update_version_labels(self):
+        installed_ver = self.settings.get("installed_translation_version", "")
+        self.installed_label.setText(f"Versione installata {installed_ver}")
+        self.installed_label.setVisible(bool(installed_ver))
+        self.update_label.setText(f"Versione disponibile {self.online_version}")
+        self.update_label.setVisible(bool(self.online_version) and self.online_version != installed_ver)
+    def on_setting_changed(self, key, value):
+        if key == "installed_translation_version":
+            self.update_version_labels()
     def show_help_window(self):
         if not self.help_window:
             self.help_window = HelpWindow()
@@ -969,6 +995,7 @@ class FolderSelectionWindow(QWidget):
             self.settings_window.close()
         if self.help_window and self.help_window.isVisible():
             self.help_window.close()
+        self.settings.unsubscribe(self.on_setting_changed)
         super().closeEvent(event)
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -978,11 +1005,6 @@ class FolderSelectionWindow(QWidget):
         if event.buttons() == Qt.LeftButton:
             self.move(event.globalPos() - self.dragPos)
             event.accept()
-    def update_fake_progress(self):
-        self.fake_progress += 2
-        self.auto_progress_bar.setValue(self.fake_progress)
-        if self.fake_progress >= 80:
-            self.fake_timer.stop()
     def add_checkboxes(self, folders):
         print("[DEBUG] add_checkboxes() -> folders:", folders)
         if folders:
@@ -1004,7 +1026,11 @@ class FolderSelectionWindow(QWidget):
                         margin-right:10px;
                     }
                 """)
-                self.checkbox_layout.addWidget(checkbox)
+                # LIVE sempre in cima, anche se arriva durante la ricerca
+                if folder_name.upper() == "LIVE":
+                    self.checkbox_layout.insertWidget(0, checkbox)
+                else:
+                    self.checkbox_layout.addWidget(checkbox)
                 self.checkboxes[checkbox] = (folder_name, folder_path)
     def select_manual_folder(self):
         print("[DEBUG] select_manual_folder() chiamato.")
@@ -1023,8 +1049,7 @@ class FolderSelectionWindow(QWidget):
                     break
             self.install_button.show()
             self.remove_button.show()
-            self.settings["last_selected_folder"] = folder
-            save_settings(self.settings)
+            self.settings.set("last_selected_folder", folder)
         else:
             print("[DEBUG] Nessuna cartella scelta.")
             self.manual_line.setText("Nessun percorso selezionato manualmente")
@@ -1036,74 +1061,85 @@ class FolderSelectionWindow(QWidget):
         if not selected_folders:
             self.show_status("Per piacere seleziona una versione", "rgba(255, 255, 0, 128)", 0)
             return
-        folder = selected_folders[0]
-        print("[DEBUG] Install su cartella:", folder)
+        print("[DEBUG] Install sulle cartelle:", selected_folders)
         self.download_progress_bar.show()
         self.download_progress_bar.setValue(0)
         self.install_button.setEnabled(False)
-        self.download_thread = DownloadThread(folder)
+        for folder_name, folder_path in selected_folders:
+            self.set_folder_state(folder_path, "in attesa")
+        from payload_cache import PayloadCache
+        ensure_settings_folder()
+        cache = PayloadCache(PAYLOAD_CACHE_FOLDER, int(self.settings.get("payload_cache_max_mb", 64)) * 1024 * 1024)
+        self.download_thread = DownloadThread(selected_folders, cache)
+        self.download_progress_bar.setFormat("%p%")
         self.download_thread.progress_signal.connect(self.download_progress_bar.setValue)
+        self.download_thread.transfer_signal.connect(self.install_transfer_update)
+        self.download_thread.folder_signal.connect(self.install_folder_update)
         self.download_thread.finished_signal.connect(self.install_finished)
         self.download_thread.start()
-        self.settings["last_selected_folder"] = folder[1]
-        save_settings(self.settings)
-    def install_finished(self, success):
-        print("[DEBUG] install_finished success=", success)
+        self.settings.set("last_selected_folder", selected_folders[0][1])
+    def set_folder_state(self, folder_path, state=None):
+        for cb, (name, path) in self.checkboxes.items():
+            if path == folder_path:
+                cb.setText(f"{name} - {state}" if state else name)
+    def install_transfer_update(self, stats):
+        def mb(value):
+            return f"{value / (1024 * 1024):.1f}" if value is not None else "?"
+        text = f"%p% - {mb(stats['bytes'])}/{mb(stats['total'])} MB"
+        if stats["compressed_bytes"] != stats["bytes"]:
+            text += f" (scaricati {mb(stats['compressed_bytes'])}/{mb(stats['compressed_total'])} MB compressi)"
+        self.download_progress_bar.setFormat(text)
+    def install_folder_update(self, folder_path, state, message):
+        print(f"[DEBUG] install_folder_update {folder_path}: {state} {message}")
+        labels = {"installing": "installazione...", "done": "installata", "error": "errore"}
+        self.set_folder_state(folder_path, labels.get(state, state))
+    def install_finished(self, success, results):
+        print("[DEBUG] install_finished success=", success, "results=", results)
         self.install_button.setEnabled(True)
-        if success:
-            if self.online_version:
-                self.settings["installed_translation_version"] = self.online_version
-                save_settings(self.settings)
-            reply = QMessageBox.question(
-                self,
-                "Installazione completata",
-                "Traduzione installata.\nVuoi installarla anche in un'altra cartella?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No
-            )
-            if reply == QMessageBox.Yes:
-                print("[DEBUG] L'utente vuole continuare a installare in altre cartelle.")
-                self.status_label.setText("Puoi continuare ad usare l'installer.")
-                self.status_label.setStyleSheet("background-color: rgba(0, 255, 0, 128); color:black; padding:10px; font-weight:bold;")
-                self.status_label.show()
-                QTimer.singleShot(3000, self.status_label.hide)
-            else:
-                print("[DEBUG] L'utente ha finito, chiusura in 3 secondi.")
-                self.show_status("Grazie per aver supportato il progetto!\nChiusura automatica in corso", "rgba(0, 255, 0, 128)", 3000)
-                QTimer.singleShot(3000, self.close)
-        else:
-            print("[DEBUG] Errore durante l'installazione.")
-            self.show_status("Errore durante l'installazione", "rgba(255, 0, 0, 128)", 0)
         self.download_progress_bar.hide()
+        if not results:
+            print("[DEBUG] Errore durante il download.")
+            for cb, (name, path) in self.checkboxes.items():
+                self.set_folder_state(path)
+            self.show_status("Errore durante il download della traduzione", "rgba(255, 0, 0, 128)", 0)
+            return
+        failed = [path for path, (ok, _) in results.items() if not ok]
+        if len(failed) < len(results) and self.online_version:
+            self.settings.set("installed_translation_version", self.online_version)
+        if failed:
+            print("[DEBUG] Installazione fallita in:", failed)
+            details = "\n".join(f"{path}: {results[path][1]}" for path in failed)
+            self.show_status(f"Traduzione installata in {len(results) - len(failed)} cartelle su {len(results)}.\n"
+                             f"Errori:\n{details}", "rgba(255, 0, 0, 128)", 0)
+            return
+        reply = QMessageBox.question(
+            self,
+            "Installazione completata",
+            f"Traduzione installata in {len(results)} cartelle.\nVuoi continuare ad usare l'installer?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            print("[DEBUG] L'utente vuole continuare ad usare l'installer.")
+            self.status_label.setText("Puoi continuare ad usare l'installer.")
+            self.status_label.setStyleSheet("background-color: rgba(0, 255, 0, 128); color:black; padding:10px; font-weight:bold;")
+            self.status_label.show()
+            QTimer.singleShot(3000, self.status_label.hide)
+        else:
+            print("[DEBUG] L'utente ha finito, chiusura in 3 secondi.")
+            self.show_status("Grazie per aver supportato il progetto!\nChiusura automatica in corso", "rgba(0, 255, 0, 128)", 3000)
+            QTimer.singleShot(3000, self.close)
     def remove(self):
         print("[DEBUG] remove() chiamato.")
         selected_folders = self.collect_selected_folders()
         if not selected_folders:
             self.show_status("Per piacere seleziona una versione", "rgba(255, 255, 0, 128)", 0)
             return
+        from translation import remove_translation
         for folder_name, folder_path in selected_folders:
             print(f"[DEBUG] Rimuovo la traduzione da {folder_name} -> {folder_path}")
-            data_folder = os.path.join(folder_path, "data")
-            config_path = os.path.join(folder_path, "user.cfg")
-            if os.path.exists(config_path):
-                os.remove(config_path)
-            if os.path.exists(data_folder):
-                localization_folder = os.path.join(data_folder, "Localization")
-                if os.path.exists(localization_folder):
-                    italian_folder = os.path.join(localization_folder, "italian_(italy)")
-                    if os.path.exists(italian_folder):
-                        for root, dirs, files in os.walk(italian_folder, topdown=False):
-                            for file in files:
-                                os.remove(os.path.join(root, file))
-                            for dir in dirs:
-                                os.rmdir(os.path.join(root, dir))
-                        os.rmdir(italian_folder)
-                    if not os.listdir(localization_folder):
-                        os.rmdir(localization_folder)
-                if not os.listdir(data_folder):
-                    os.rmdir(data_folder)
-            self.show_status("Traduzione rimossa\nCHIUSURA IMMINENTE", "rgba(255, 0, 0, 128)", 5000)
-            return
+            remove_translation(folder_path)
+        self.show_status("Traduzione rimossa\nCHIUSURA IMMINENTE", "rgba(255, 0, 0, 128)", 5000)
     def show_status(self, message, color, close_after_ms):
         print(f"[DEBUG] show_status -> {message}")
         self.status_label.setText(message)
@@ -1111,8 +1147,12 @@ class FolderSelectionWindow(QWidget):
         self.status_label.show()
         if close_after_ms:
             QTimer.singleShot(close_after_ms, self.close)
-    def start_auto_search(self):
-        print("[DEBUG] start_auto_search() chiamato.")
+    def start_auto_search(self, force_rescan=False):
+        print("[DEBUG] start_auto_search() chiamato. force_rescan =", force_rescan)
+        if self.search_thread is not None and self.search_thread.isRunning():
+            print("[DEBUG] Ricerca già in corso, ignoro la richiesta.")
+            return
+        self.last_search_summary = None
         for i in reversed(range(self.checkbox_layout.count())):
             widget_to_remove = self.checkbox_layout.itemAt(i).widget()
             if widget_to_remove is not None:
@@ -1121,38 +1161,81 @@ class FolderSelectionWindow(QWidget):
         self.placeholder_label.hide()
         self.search_status_label.show()
         self.auto_progress_bar.show()
-        self.fake_progress = 0
-        self.auto_progress_bar.setValue(self.fake_progress)
-        self.fake_timer.start(210)
-        self.search_thread = ProgressThread()
+        self.auto_progress_bar.setValue(0)
+        self.search_status_label.setText("Sto cercando le tue installazioni, attendi qualche secondo...")
+        self.search_thread = ProgressThread(
+            force_rescan=force_rescan,
+            last_selected_folder=self.settings.get("last_selected_folder", "")
+        )
+        self.search_thread.progress_signal.connect(self.auto_progress_bar.setValue)
+        self.search_thread.stats_signal.connect(self.auto_search_progress)
+        self.search_thread.found_signal.connect(self.auto_search_found)
+        self.search_thread.summary_signal.connect(self.auto_search_summary)
         self.search_thread.result_signal.connect(self.auto_search_finished)
         self.search_thread.start()
+        self.cancel_search_button.setEnabled(True)
+        self.cancel_search_button.show()
+    def cancel_auto_search(self):
+        print("[DEBUG] cancel_auto_search() chiamato.")
+        if self.search_thread is not None and self.search_thread.isRunning():
+            self.search_thread.cancel()
+            self.cancel_search_button.setEnabled(False)
+            self.search_status_label.setText("Interruzione della ricerca in corso...")
+    def auto_search_summary(self, summary):
+        print("[DEBUG] auto_search_summary ->", summary)
+        self.last_search_summary = summary
+    def auto_search_found(self, folder_name, folder_path):
+        print("[DEBUG] auto_search_found ->", folder_name, folder_path)
+        self.instruction_label.setText("SELEZIONA LA VERSIONE DI STAR CITIZEN\nALLA QUALE VUOI AGGIUNGERE O RIMUOVERE LA TRADUZIONE")
+        self.add_checkboxes([(folder_name, folder_path)])
+        self.install_button.show()
+        self.remove_button.show()
+    def auto_search_progress(self, stats):
+        if not stats["drives_total"]:
+            return
+        text = f"Cartelle esaminate: {stats['dirs_visited']} - dischi completati {stats['drives_done']}/{stats['drives_total']}"
+        if stats["eta"]:
+            text += f" - circa {int(stats['eta']) + 1} s rimanenti"
+        self.search_status_label.setText(text)
     def auto_search_finished(self, folders):
         print("[DEBUG] auto_search_finished ->", folders)
-        self.fake_timer.stop()
         self.auto_progress_bar.setValue(100)
         QTimer.singleShot(500, self.auto_progress_bar.hide)
         self.search_status_label.hide()
-        if folders:
-            self.instruction_label.setText("SELEZIONA LA VERSIONE DI STAR CITIZEN\nALLA QUALE VUOI AGGIUNGERE O RIMUOVERE LA TRADUZIONE")
-            self.add_checkboxes(folders)
-            self.install_button.show()
-            self.remove_button.show()
-        else:
+        self.cancel_search_button.hide()
+        summary = self.last_search_summary or {}
+        incomplete = summary.get("partial", []) + summary.get("skipped", [])
+        if incomplete:
+            # Una nuova ricerca riprende i dischi lasciati a metà invece di ricominciare
+            self.show_status(
+                "Dischi non scansionati completamente: " + ", ".join(incomplete)
+                + "\n'Ricerca automatica' riprende da dove si era fermata, 'Ricerca completa' include dischi di rete e rimovibili.",
+                "rgba(255, 255, 0, 128)", 0
+            )
+        if not folders:
             QMessageBox.warning(self, "Ricerca completata", "Nessuna cartella valida trovata.")
 
 # ------------------------------------------------------------
 #              FLUSSO PRINCIPALE
 # ------------------------------------------------------------
+# Finestra principale, tenuta in vita da questo riferimento dopo i termini d'uso
+main_window = None
+
+def report_first_window():
+    startup_profile.mark("prima finestra (termini d'uso)")
+    startup_profile.report()
+
 def handle_terms_and_update(settings, online_version):
     print("[DEBUG] handle_terms_and_update() chiamato - mostro WarningWindow.")
     warning_window = WarningWindow()
+    # La finestra è visibile quando parte il suo ciclo di eventi
+    QTimer.singleShot(0, report_first_window)
     result = warning_window.exec_()
     print("[DEBUG] Risultato di warning_window.exec_():", result)
     if result == QDialog.Accepted:
         print("[DEBUG] L'utente ha accettato i termini.")
         if online_version is None:
-            online_version = CURRENT_INSTALLER_VERSION
+            online_version = CURRENT_TRANSLATION_VERSION
         folder_window = FolderSelectionWindow(online_version=online_version, settings=settings)
         folder_window.show()
         global main_window
@@ -1161,45 +1244,146 @@ def handle_terms_and_update(settings, online_version):
         print("[DEBUG] L'utente NON ha accettato i termini. sys.exit(0).")
         sys.exit(0)
 
+class StartupOrchestrator(QObject):
+    """
+    Gestisce l'avvio: mostra subito lo splash dalla cache (vedi
+    splash_cache.py), aggiorna in background lo splash dinamico, scarica la
+    versione online e passa ai termini d'uso appena
+    la versione è arrivata e lo splash è rimasto visibile almeno
+    splash_min_ms. Se la rete è lenta dopo splash_max_wait_ms si prosegue
+    comunque. I tempi di ogni fase vengono stampati nel log.
+    """
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.splash = None
+        self.showing_dynamic = False
+        self.online_version = None
+        self.version_ready = False
+        self.min_elapsed = False
+        self.finished = False
+        ttl = float(settings.get("metadata_ttl_minutes", 60)) * 60
+        self.metadata = MetadataCache(METADATA_CACHE_FILE, ttl=ttl)
+        self.version_thread = VersionCheckThread(self.metadata)
+        self.version_thread.version_found.connect(self.on_version_found)
+        self.version_thread.version_updated.connect(self.on_version_updated)
+        self.splash_cache = SplashCache(SPLASH_CACHE_FOLDER)
+        screen = QApplication.primaryScreen()
+        self.pixel_ratio = screen.devicePixelRatio()
+        available = screen.availableGeometry()
+        # Lato dello splash in pixel fisici: mai più grande di una parte dello schermo
+        self.splash_side = int(min(SPLASH_MAX_SIDE, min(available.width(), available.height()) * SPLASH_SCREEN_FRACTION)
+                               * self.pixel_ratio)
+        self.splash_thread = SplashRefreshThread(self.splash_cache, self.splash_side)
+        self.splash_thread.splash_found.connect(self.on_splash_found)
+    def elapsed_ms(self):
+        return startup_profile.elapsed_ms()
+    def start(self):
+        self.version_thread.start()
+        image = None
+        if self.settings.get("use_dynamic_splash", True):
+            self.splash_thread.start()
+            image = self.splash_cache.load("dynamic", side=self.splash_side)
+            self.showing_dynamic = image is not None
+        if image is None:
+            image = self.static_splash_image()
+        if image is not None:
+            self.show_splash(image)
+            startup_profile.mark("splash mostrato")
+        print(f"[DEBUG] Avvio: splash locale dopo {self.elapsed_ms():.0f} ms (dinamico: {self.showing_dynamic})")
+        QTimer.singleShot(int(self.settings.get("splash_min_ms", 1000)), self.on_min_elapsed)
+        QTimer.singleShot(int(self.settings.get("splash_max_wait_ms", 5000)), self.on_deadline)
+    def static_splash_image(self):
+        """
+        Lo splash incluso nell'eseguibile, dalla cache se c'è già alla
+        dimensione giusta; altrimenti viene decodificato una volta e salvato.
+        """
+        local_splash_path = resource_path(STATIC_SPLASH_FILENAME)
+        if not os.path.exists(local_splash_path):
+            print("[DEBUG] Splash statico non disponibile:", local_splash_path)
+            return None
+        # L'immagine inclusa cambia solo con una nuova versione dell'installer
+        key = f"{LAUNCHER_VERSION}:{os.path.getsize(local_splash_path)}"
+        image = self.splash_cache.load("static", key=key, side=self.splash_side)
+        if image is not None:
+            return image
+        image = QImage(local_splash_path)
+        if image.isNull():
+            print("[DEBUG] Impossibile caricare lo splash statico: immagine nulla.")
+            return None
+        image = prepare_image(image, self.splash_side)
+        try:
+            self.splash_cache.store("static", image, self.splash_side, key=key)
+        except Exception as e:
+            print("[DEBUG] Errore salvando lo splash statico in cache:", e)
+        return image
+    def show_splash(self, image):
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.pixel_ratio)
+        if self.splash is None:
+            self.splash = QSplashScreen(pixmap)
+        else:
+            self.splash.setPixmap(pixmap)
+        self.splash.show()
+    def on_splash_found(self, image):
+        # Se stiamo già mostrando lo splash dinamico in cache, quello nuovo vale dal prossimo avvio
+        if self.finished or self.showing_dynamic:
+            return
+        print(f"[DEBUG] Avvio: splash dinamico dopo {self.elapsed_ms():.0f} ms")
+        self.showing_dynamic = True
+        self.show_splash(image)
+    def on_version_found(self, version_str):
+        print(f"[DEBUG] Avvio: versione online {version_str} dopo {self.elapsed_ms():.0f} ms")
+        self.online_version = version_str
+        self.version_ready = True
+        if self.finished:
+            # Arrivata dopo splash_max_wait_ms: i termini (o la finestra) sono già aperti senza versione
+            self.forward_online_version()
+        else:
+            self.maybe_continue()
+    def on_version_updated(self, version_str):
+        print(f"[DEBUG] Versione online aggiornata in background: {version_str}")
+        self.online_version = version_str
+        if self.finished:
+            self.forward_online_version()
+    def forward_online_version(self):
+        # Durante i termini main_window non c'è ancora: ci pensa maybe_continue quando si chiudono
+        if main_window is not None and self.online_version:
+            main_window.set_online_version(self.online_version)
+    def on_min_elapsed(self):
+        self.min_elapsed = True
+        self.maybe_continue()
+    def on_deadline(self):
+        if not self.finished:
+            print("[DEBUG] Avvio: versione online non ancora disponibile, proseguo senza.")
+            self.version_ready = True
+            self.maybe_continue()
+    def maybe_continue(self):
+        if self.finished or not (self.version_ready and self.min_elapsed):
+            return
+        self.finished = True
+        if self.splash is not None:
+            self.splash.close()
+        print(f"[DEBUG] Avvio: tempo all'interattività {self.elapsed_ms():.0f} ms")
+        startup_profile.mark("versione online" if self.online_version else "scadenza attesa versione")
+        online_version = self.online_version
+        handle_terms_and_update(self.settings, online_version=online_version)
+        if self.online_version != online_version:
+            # La versione è arrivata (o cambiata) mentre erano aperti i termini
+            self.forward_online_version()
+
 def run_installer():
     print("[DEBUG] run_installer() - Avvio dell'app.")
     app = QApplication(sys.argv)
-    settings = load_settings()
-    print("[DEBUG] Impostazioni:", settings)
-    version_thread_result = {"version": None}
-    def on_version_found(version_str):
-        print("[DEBUG] VersionCheckThread -> versione trovata:", version_str)
-        version_thread_result["version"] = version_str
-    version_thread = VersionCheckThread()
-    version_thread.version_found.connect(on_version_found)
-    version_thread.start()
-    splash_shown = False
-    if settings.get("use_dynamic_splash", True):
-        splash_pixmap = download_splash_image(SPLASH_IMAGE_URL)
-        if splash_pixmap:
-            splash = QSplashScreen(splash_pixmap)
-            splash.show()
-            splash_shown = True
-            QApplication.processEvents()
-    else:
-        local_splash_path = resource_path(STATIC_SPLASH_FILENAME)
-        if os.path.exists(local_splash_path):
-            static_pixmap = QPixmap(local_splash_path)
-            if not static_pixmap.isNull():
-                splash = QSplashScreen(static_pixmap)
-                splash.show()
-                splash_shown = True
-                QApplication.processEvents()
-            else:
-                print("[DEBUG] Impossibile caricare lo splash statico: pixmap nulla.")
-        else:
-            print("[DEBUG] File statico non trovato:", local_splash_path)
-    def close_splash_and_continue():
-        if splash_shown:
-            splash.close()
-        handle_terms_and_update(settings, online_version=version_thread_result["version"])
-    QTimer.singleShot(3000, close_splash_and_continue)
-    sys.exit(app.exec_())
+    startup_profile.mark("QApplication")
+    settings = SettingsStore(SETTINGS_FILE)
+    orchestrator = StartupOrchestrator(settings)
+    orchestrator.start()
+    exit_code = app.exec_()
+    settings.flush()
+    http_client.log_stats()
+    startup_profile.report("Profilo a fine esecuzione")
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     run_installer()
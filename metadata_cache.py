@@ -0,0 +1,147 @@
+"""
+Cache dei piccoli file di metadati letti a ogni avvio (la versione della
+traduzione, launcher_info.txt dell'updater).
+
+Per ogni URL vengono salvati l'ultimo contenuto, i validatori HTTP
+(ETag/Last-Modified) e l'ora dell'ultimo controllo. Finché il valore è più
+giovane del TTL viene restituito senza usare la rete; quando è scaduto
+viene restituito comunque subito e ricontrollato in background con una
+richiesta condizionale (stale-while-revalidate). Senza rete si usa sempre
+l'ultimo valore noto.
+"""
+import os
+import json
+import time
+import threading
+
+import http_client
+from atomic_files import atomic_write
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+DEFAULT_TTL = 60 * 60
+
+class MetadataCache:
+    """
+    File JSON url -> {value, etag, last_modified, fetched_at}, condiviso tra
+    installer e updater.
+    """
+    def __init__(self, path, ttl=DEFAULT_TTL, get=None):
+        self.path = path
+        self.ttl = ttl
+        self.get_func = get or http_client.get
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self.pending = {}
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[DEBUG] Cache dei metadati illeggibile ({e}), la ricreo.")
+            return {}
+
+    def _store(self, url, entry):
+        with self.lock:
+            self.entries[url] = entry
+            # Il file è condiviso con l'altro eseguibile: si riscrive solo la propria voce
+            entries = self._load()
+            entries[url] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, json.dumps(entries, ensure_ascii=False, indent=4))
+
+    def age(self, url):
+        """
+        Secondi dall'ultimo controllo riuscito di url, oppure None se non è in cache.
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        return time.time() - entry["fetched_at"]
+
+    def fetch(self, url, headers=None):
+        """
+        Controlla url con una richiesta condizionale e aggiorna la cache.
+        Restituisce il valore aggiornato, oppure None se la richiesta fallisce.
+        """
+        entry = self.entries.get(url, {})
+        headers = dict(headers or {})
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = self.get_func(url, headers=headers)
+        except Exception as e:
+            print(f"[DEBUG] Metadati non raggiungibili ({url}):", e)
+            return None
+        if response.status_code == 304 and "value" in entry:
+            entry = dict(entry, fetched_at=time.time())
+        elif response.status_code == 200:
+            entry = {
+                "value": response.text,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            }
+        else:
+            print(f"[DEBUG] Metadati {url}: risposta {response.status_code}, tengo l'ultimo valore noto.")
+            return None
+        self._store(url, entry)
+        return entry["value"]
+
+    def get(self, url, ttl=None, headers=None, background=True, on_update=None):
+        """
+        Restituisce (valore, origine). origine è "fresh" (in cache ed entro il
+        TTL, nessuna richiesta), "stale" (scaduto: ricontrollato in
+        background, on_update riceve il nuovo valore se cambia), "network"
+        (appena scaricato) oppure "offline" (rete non disponibile: ultimo
+        valore noto, o None se non c'è). Con background=False un valore
+        scaduto viene ricontrollato subito.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        entry = self.entries.get(url)
+        if entry is None:
+            value = self.fetch(url, headers)
+            return value, ("network" if value is not None else "offline")
+        age = self.age(url)
+        # Un'età negativa (orologio spostato indietro) conta come scaduta
+        if 0 <= age < ttl:
+            return entry["value"], "fresh"
+        if background:
+            self.revalidate_async(url, headers, on_update)
+            return entry["value"], "stale"
+        value = self.fetch(url, headers)
+        if value is None:
+            return entry["value"], "offline"
+        return value, "network"
+
+    def revalidate_async(self, url, headers=None, on_update=None):
+        """
+        Ricontrolla url in un thread separato (uno solo alla volta per URL).
+        """
+        with self.lock:
+            thread = self.pending.get(url)
+            if thread is not None and thread.is_alive():
+                return
+            previous = self.entries.get(url, {}).get("value")
+            def run():
+                value = self.fetch(url, headers)
+                if value is not None and value != previous and on_update:
+                    on_update(value)
+            thread = threading.Thread(target=run, name="metadata-revalidate", daemon=True)
+            self.pending[url] = thread
+        thread.start()
+
+    def wait(self, timeout=None):
+        """
+        Attende la fine dei controlli in background (al massimo timeout secondi in tutto).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in list(self.pending.values()):
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            thread.join(remaining)
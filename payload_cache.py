@@ -0,0 +1,225 @@
+"""
+Cache locale dei file della traduzione, indirizzata per contenuto.
+
+Ogni versione di global.ini viene salvata una sola volta con il suo hash
+SHA-256 come nome; le installazioni (nuove cartelle, reinstallazioni,
+riparazioni) la copiano da qui o, se il filesystem lo permette, creano un
+hardlink. Quando la cache supera la dimensione massima vengono eliminati
+i file usati meno di recente.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from atomic_files import hash_file, replace_file
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+INDEX_FILENAME = "index.json"
+
+class PayloadCache:
+    """
+    Cache su disco in root/objects/<aa>/<sha256>, con un indice JSON che
+    tiene dimensione, origine, ultimo utilizzo e ultima verifica di ogni oggetto.
+    """
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Una verifica alla volta: più installazioni in parallelo dello stesso
+        # oggetto aspettano la prima invece di rileggerlo ciascuna
+        self.verify_lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self.index_path = os.path.join(self.root, INDEX_FILENAME)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[DEBUG] Indice della cache illeggibile ({e}), lo ricreo.")
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print("[DEBUG] Errore salvando l'indice della cache:", e)
+
+    def path_for(self, sha256):
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def has(self, sha256):
+        """
+        True se l'oggetto è in cache con la dimensione attesa.
+        """
+        if not sha256:
+            return False
+        try:
+            size = os.path.getsize(self.path_for(sha256))
+        except OSError:
+            return False
+        expected = self.index.get(sha256, {}).get("size")
+        return expected is None or expected == size
+
+    def _stamp(self, sha256):
+        stat = os.stat(self.path_for(sha256))
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def verify(self, sha256):
+        """
+        Controlla l'hash dell'oggetto: un hardlink modificato sul posto dal
+        gioco o dall'utente corromperebbe anche la cache. Dimensione e mtime
+        dell'ultima verifica riuscita restano nell'indice, così l'oggetto
+        viene riletto solo se è cambiato (una scrittura attraverso un
+        hardlink cambia anche la sua mtime) e non per ogni cartella
+        installata. Gli oggetti corrotti vengono eliminati.
+        """
+        if not self.has(sha256):
+            return False
+        with self.verify_lock:
+            try:
+                stamp = self._stamp(sha256)
+            except OSError:
+                return False
+            if self.index.get(sha256, {}).get("verified") == stamp:
+                return True
+            if hash_file(self.path_for(sha256)).hexdigest() == sha256:
+                with self.lock:
+                    if sha256 in self.index:
+                        self.index[sha256]["verified"] = stamp
+                return True
+        print(f"[DEBUG] Oggetto corrotto nella cache, lo elimino: {sha256}")
+        with self.lock:
+            try:
+                os.remove(self.path_for(sha256))
+            except OSError:
+                pass
+            self.index.pop(sha256, None)
+            self._save_index()
+        return False
+
+    def total_bytes(self):
+        return sum(entry.get("size", 0) for entry in self.index.values())
+
+    def _touch(self, sha256, **info):
+        with self.lock:
+            entry = self.index.setdefault(sha256, {"added": time.time()})
+            entry.update(info)
+            entry["last_used"] = time.time()
+            if "size" not in entry:
+                entry["size"] = os.path.getsize(self.path_for(sha256))
+            self._evict(keep=sha256)
+            self._save_index()
+
+    def _evict(self, keep=None):
+        """
+        Elimina gli oggetti usati meno di recente finché la cache non rientra in max_bytes.
+        """
+        total = self.total_bytes()
+        for sha256, entry in sorted(self.index.items(), key=lambda item: item[1].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            try:
+                os.remove(self.path_for(sha256))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[DEBUG] Impossibile eliminare {sha256} dalla cache: {e}")
+                continue
+            total -= entry.get("size", 0)
+            del self.index[sha256]
+            print(f"[DEBUG] Eliminato dalla cache (LRU): {sha256}")
+
+    def add_stream(self, chunks, source=None):
+        """
+        Salva in cache i byte prodotti dall'iteratore chunks calcolando
+        l'hash mentre arrivano e restituisce lo SHA-256 del contenuto.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.root, f"incoming-{os.getpid()}-{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            sha256 = digest.hexdigest()
+            final_path = self.path_for(sha256)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            replace_file(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        # L'hash è stato calcolato mentre arrivavano i byte: l'oggetto è già verificato
+        self._touch(sha256, size=size, source=source, verified=self._stamp(sha256))
+        return sha256
+
+    def add_file(self, path, source=None, sha256=None):
+        """
+        Sposta in cache un file già scaricato (ad esempio da downloads.py) e
+        ne restituisce lo SHA-256. Il file deve stare sullo stesso volume
+        della cache, così lo spostamento è un semplice rename. Se l'hash è
+        già noto (calcolato durante il download) il file non viene riletto.
+        """
+        size = os.path.getsize(path)
+        if not sha256:
+            sha256 = hash_file(path).hexdigest()
+        final_path = self.path_for(sha256)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(path, final_path)
+        # Con l'hash passato dal chiamante la verifica è quella fatta durante il download
+        self._touch(sha256, size=size, source=source, verified=self._stamp(sha256))
+        return sha256
+
+    def download_path(self, name):
+        """
+        Percorso dove scaricare un file destinato alla cache (stesso volume).
+        """
+        folder = os.path.join(self.root, "downloads")
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, name)
+
+    def materialize(self, sha256, target_path, allow_hardlink=True):
+        """
+        Mette l'oggetto in target_path: prova con un hardlink (stesso volume,
+        nessuna copia) e altrimenti copia. Il file finale compare in un solo
+        passo con os.replace, quindi non resta mai a metà.
+        """
+        source = self.path_for(sha256)
+        if not self.verify(sha256):
+            raise FileNotFoundError(f"Oggetto {sha256} non presente o corrotto nella cache")
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = target_path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        linked = False
+        if allow_hardlink:
+            try:
+                os.link(source, tmp_path)
+                linked = True
+            except OSError:
+                linked = False
+        if linked:
+            os.replace(tmp_path, target_path)
+        else:
+            shutil.copyfile(source, tmp_path)
+            replace_file(tmp_path, target_path)
+        self._touch(sha256)
+        print(f"[DEBUG] {'Hardlink' if linked else 'Copia'} dalla cache: {sha256} -> {target_path}")
+        return linked
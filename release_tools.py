@@ -0,0 +1,136 @@
+"""
+Strumenti per pubblicare una nuova versione della traduzione.
+
+    python release_tools.py delta VECCHIO.ini NUOVO.ini -o delta.json
+        crea il delta chiave per chiave tra due versioni di global.ini
+    python release_tools.py compress NUOVO.ini [--encoding gzip|xz|zstd ...]
+        crea le varianti compresse (NUOVO.ini.gz, .xz, .zst; di default gzip e xz)
+    python release_tools.py index NUOVO.ini --delta delta.json=URL [...] --file NUOVO.ini.gz=URL [...] -o index.json
+        crea l'indice che l'installer legge da RELEASE_INDEX_URL: per ogni
+        versione di base l'URL del delta pubblicato e per ogni variante
+        compressa il suo URL, con hash e dimensione
+
+Di solito si crea un delta da ognuna delle ultime versioni rilasciate alla
+nuova e le varianti compresse, si caricano i file e poi si pubblica l'indice.
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+from atomic_files import hash_file
+from ini_delta import DELTA_FORMAT, DeltaError, make_delta, load_delta
+from compression import EXTENSIONS, CompressionError, compress_file, decompress_stream, encoding_for_path, file_chunks
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=True, separators=(",", ":"))
+
+def cmd_delta(args):
+    try:
+        delta = make_delta(args.base, args.target)
+    except DeltaError as e:
+        print(f"Impossibile creare il delta: {e}. Pubblicare solo il file completo.", file=sys.stderr)
+        return 1
+    write_json(args.output, delta)
+    print(f"Delta {delta['base_sha256'][:12]} -> {delta['target_sha256'][:12]}: "
+          f"{len(delta['set'])} cambiate, {len(delta['add'])} aggiunte, {len(delta['remove'])} rimosse, "
+          f"{os.path.getsize(args.output)} byte (file completo: {delta['target_size']} byte)")
+    return 0
+
+def cmd_compress(args):
+    size = os.path.getsize(args.target)
+    for encoding in args.encoding or ["gzip", "xz"]:
+        output = args.target + EXTENSIONS[encoding]
+        try:
+            compress_file(args.target, output, encoding)
+        except CompressionError as e:
+            print(f"{encoding}: {e}", file=sys.stderr)
+            return 1
+        print(f"{output}: {os.path.getsize(output)} byte ({os.path.getsize(output) * 100 / size:.1f}% di {size})")
+    return 0
+
+def split_item(item, option):
+    path, sep, url = item.partition("=")
+    if not sep:
+        raise ValueError(f"{option} vuole FILE=URL, ricevuto: {item}")
+    return path, url
+
+def cmd_index(args):
+    target_sha256 = hash_file(args.target).hexdigest()
+    index = {
+        "format": DELTA_FORMAT,
+        "target_sha256": target_sha256,
+        "target_size": os.path.getsize(args.target),
+        "deltas": {},
+        "files": {},
+    }
+    try:
+        deltas = [split_item(item, "--delta") for item in args.delta or []]
+        files = [split_item(item, "--file") for item in args.file or []]
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    for path, url in deltas:
+        delta = load_delta(path)
+        if delta["target_sha256"] != target_sha256:
+            print(f"{path} non porta alla versione {args.target}", file=sys.stderr)
+            return 1
+        index["deltas"][delta["base_sha256"]] = {
+            "url": url,
+            "sha256": hash_file(path).hexdigest(),
+            "size": os.path.getsize(path),
+        }
+    for path, url in files:
+        encoding = encoding_for_path(path)
+        if encoding is None:
+            print(f"{path}: estensione sconosciuta (attese {', '.join(EXTENSIONS.values())})", file=sys.stderr)
+            return 2
+        # Verifica che la variante si decomprima davvero nella nuova versione
+        digest = hashlib.sha256()
+        for chunk in decompress_stream(file_chunks(path), encoding):
+            digest.update(chunk)
+        if digest.hexdigest() != target_sha256:
+            print(f"{path} non si decomprime in {args.target}", file=sys.stderr)
+            return 1
+        index["files"][encoding] = {
+            "url": url,
+            "sha256": hash_file(path).hexdigest(),
+            "size": os.path.getsize(path),
+        }
+    write_json(args.output, index)
+    print(f"Indice per {target_sha256[:12]} con {len(index['deltas'])} delta e "
+          f"{len(index['files'])} varianti compresse scritto in {args.output}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Strumenti di rilascio della traduzione")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    delta = commands.add_parser("delta", help="Crea il delta tra due versioni di global.ini")
+    delta.add_argument("base", help="global.ini della versione precedente")
+    delta.add_argument("target", help="global.ini della nuova versione")
+    delta.add_argument("-o", "--output", required=True, help="File JSON del delta")
+    delta.set_defaults(func=cmd_delta)
+
+    compress = commands.add_parser("compress", help="Crea le varianti compresse della nuova versione")
+    compress.add_argument("target", help="global.ini della nuova versione")
+    compress.add_argument("--encoding", action="append", choices=sorted(EXTENSIONS),
+                          help="Compressione da usare (ripetibile, di default gzip e xz)")
+    compress.set_defaults(func=cmd_compress)
+
+    index = commands.add_parser("index", help="Crea l'indice di rilascio per la nuova versione")
+    index.add_argument("target", help="global.ini della nuova versione")
+    index.add_argument("--delta", action="append", metavar="FILE=URL",
+                       help="Delta pubblicato e il suo URL (ripetibile)")
+    index.add_argument("--file", action="append", metavar="FILE=URL",
+                       help="Variante compressa pubblicata e il suo URL (ripetibile)")
+    index.add_argument("-o", "--output", required=True, help="File JSON dell'indice")
+    index.set_defaults(func=cmd_index)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,843 @@
+"""
+Ricerca delle installazioni di Star Citizen sui dischi locali.
+
+Contiene il crawler dei drive e l'indice persistente delle installazioni
+trovate, così le ricerche successive non devono ripercorrere ogni disco.
+"""
+import os
+import re
+import json
+import time
+import glob
+import queue
+import ctypes
+import hashlib
+import threading
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+# Usati solo se non è possibile chiedere i volumi al sistema operativo
+DEFAULT_DRIVES = ['A:\\', 'B:\\', 'C:\\', 'D:\\', 'E:\\', 'F:\\', 'G:\\', 'H:\\']
+GAME_ARCHIVE = "Data.p4k"
+
+# Filesystem virtuali di Linux che non vanno mai scansionati
+PSEUDO_FILESYSTEMS = {
+    "proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "cgroup", "cgroup2", "securityfs", "pstore",
+    "debugfs", "tracefs", "configfs", "fusectl", "mqueue", "hugetlbfs", "bpf", "autofs",
+    "binfmt_misc", "rpc_pipefs", "nsfs", "squashfs", "efivarfs", "ramfs", "overlay",
+}
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p", "afs", "ceph", "glusterfs"}
+OPTICAL_FILESYSTEMS = {"iso9660", "udf"}
+# Cartelle di lavoro parallele per dispositivo: tante sugli SSD, una sola per disco meccanico
+SSD_WORKERS = 8
+HDD_WORKERS = 1
+UNKNOWN_DEVICE_WORKERS = 2
+
+# Cartelle (nome in minuscolo) che non possono contenere un'installazione del gioco
+DEFAULT_PRUNE_NAMES = {
+    "windows", "system volume information", "recovery", "perflogs", "msocache",
+    "windowsapps", "appdata", "programdata", "node_modules", ".git", "__pycache__",
+    "steamapps", "steamlibrary", "origin games", "ea games", "epic games", "ubisoft game launcher",
+}
+# Anche le cartelle di sistema che iniziano con "$" ($Recycle.Bin, $WinREAgent, ...)
+DEFAULT_PRUNE_PREFIXES = ("$",)
+# Profondità massima dalla radice del drive
+DEFAULT_MAX_DEPTH = 12
+# Livelli esplorati sotto una cartella "StarCitizen" (StarCitizen/<CANALE> è 1 livello)
+DEFAULT_SHAPE_DEPTH = 2
+# Nomi di cartella che portano più probabilmente a un'installazione: vengono visitati per primi
+HINT_NAMES = ("roberts space industries", "starcitizen", "program files", "games")
+
+# Percorsi di installazione predefiniti relativi alla radice del drive
+DEFAULT_INSTALL_DIRS = (
+    os.path.join("Program Files", "Roberts Space Industries", "StarCitizen"),
+    os.path.join("Roberts Space Industries", "StarCitizen"),
+    os.path.join("Games", "Roberts Space Industries", "StarCitizen"),
+    "StarCitizen",
+)
+# File del launcher RSI (in %APPDATA%\rsilauncher) da cui leggere le cartelle della libreria
+LAUNCHER_FILE_PATTERNS = ("*.json", os.path.join("logs", "*.log"))
+# Quanti byte leggere al massimo da ogni file del launcher (i log possono essere grandi)
+LAUNCHER_READ_LIMIT = 1024 * 1024
+LAUNCHER_PATH_RE = re.compile(r"([A-Za-z]:[\\/][^\"'\r\n<>|*?]*?(?:StarCitizen|Roberts Space Industries))(?:[\\/]+([A-Za-z-]+))?", re.IGNORECASE)
+
+# Budget di tempo (secondi) per singolo drive e per l'intera scansione
+DEFAULT_DRIVE_BUDGET = 120
+DEFAULT_TOTAL_BUDGET = 300
+# Tipi di volume saltati nella ricerca normale (la ricerca completa li scansiona comunque)
+SKIPPED_DRIVE_TYPES = ("network", "cdrom")
+# Oltre questo numero di cartelle in sospeso una scansione parziale non viene ripresa ma rifatta
+MAX_PENDING_DIRS = 20000
+
+INDEX_VERSION = 1
+# Oltre questa età l'indice viene considerato vecchio e i drive vengono riscansionati
+INDEX_MAX_AGE = 7 * 24 * 3600
+
+# ------------------------------------------------------------
+#                 IDENTITÀ DEI VOLUMI
+# ------------------------------------------------------------
+def volume_signature(drive):
+    """
+    Restituisce una tupla (volume_id, firma) che descrive lo stato del drive.
+    volume_id è st_dev della radice (su Windows è il numero di serie del volume),
+    la firma è un hash dei mtime delle cartelle di primo livello.
+    Restituisce None se il drive non esiste o non è leggibile.
+    """
+    try:
+        volume_id = os.stat(drive).st_dev
+        entries = []
+        with os.scandir(drive) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        entries.append((entry.name, entry.stat(follow_symlinks=False).st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    digest = hashlib.sha1()
+    for name, mtime in sorted(entries):
+        digest.update(f"{name}\0{mtime}\n".encode("utf-8", "surrogatepass"))
+    return volume_id, digest.hexdigest()
+
+def _linux_mounts():
+    """
+    Restituisce un dict punto di montaggio -> (dispositivo, filesystem) letto da /proc/self/mounts.
+    """
+    mounts = {}
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # Gli spazi nei percorsi sono codificati come \040
+                mount_point = fields[1].replace("\\040", " ")
+                mounts[mount_point] = (fields[0], fields[2])
+    except OSError:
+        pass
+    return mounts
+
+def list_volumes():
+    """
+    Restituisce i volumi da scansionare chiedendoli al sistema operativo:
+    le lettere di unità presenti su Windows, i punti di montaggio reali su Linux.
+    """
+    if os.name == "nt":
+        try:
+            mask = ctypes.windll.kernel32.GetLogicalDrives()
+        except Exception:
+            return list(DEFAULT_DRIVES)
+        return [f"{chr(ord('A') + i)}:\\" for i in range(26) if mask & (1 << i)]
+    volumes = [mount_point for mount_point, (device, fstype) in _linux_mounts().items()
+               if fstype not in PSEUDO_FILESYSTEMS and not mount_point.startswith(("/proc", "/sys", "/dev", "/run"))]
+    return sorted(volumes) or ["/"]
+
+def _linux_block_device(drive):
+    """
+    Restituisce la cartella di /sys/block del disco che contiene il volume, o None.
+    """
+    try:
+        st_dev = os.stat(drive).st_dev
+    except OSError:
+        return None
+    sys_path = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+    if not os.path.isdir(sys_path):
+        return None
+    if os.path.exists(os.path.join(sys_path, "partition")):
+        sys_path = os.path.dirname(sys_path)
+    return sys_path
+
+def _read_sys_flag(path):
+    try:
+        with open(path, "r", encoding="ascii") as f:
+            return f.read().strip() == "1"
+    except OSError:
+        return None
+
+class _STORAGE_PROPERTY_QUERY(ctypes.Structure):
+    _fields_ = [("PropertyId", ctypes.c_uint), ("QueryType", ctypes.c_uint),
+                ("AdditionalParameters", ctypes.c_ubyte * 1)]
+
+class _DEVICE_SEEK_PENALTY_DESCRIPTOR(ctypes.Structure):
+    _fields_ = [("Version", ctypes.c_uint32), ("Size", ctypes.c_uint32), ("IncursSeekPenalty", ctypes.c_ubyte)]
+
+class _STORAGE_DEVICE_NUMBER(ctypes.Structure):
+    _fields_ = [("DeviceType", ctypes.c_uint32), ("DeviceNumber", ctypes.c_uint32), ("PartitionNumber", ctypes.c_uint32)]
+
+def _windows_disk_info(drive):
+    """
+    Restituisce (numero del disco fisico, ha penalità di seek) per una lettera
+    di unità usando DeviceIoControl; ogni valore è None se non disponibile.
+    """
+    IOCTL_STORAGE_GET_DEVICE_NUMBER = 0x2D1080
+    IOCTL_STORAGE_QUERY_PROPERTY = 0x2D1400
+    StorageDeviceSeekPenaltyProperty = 7
+    try:
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateFileW.restype = ctypes.c_void_p
+        handle = kernel32.CreateFileW(f"\\\\.\\{drive[:2]}", 0, 3, None, 3, 0, None)
+    except Exception:
+        return None, None
+    if handle in (None, ctypes.c_void_p(-1).value):
+        return None, None
+    disk_number = seek_penalty = None
+    try:
+        returned = ctypes.c_uint32()
+        number = _STORAGE_DEVICE_NUMBER()
+        if kernel32.DeviceIoControl(ctypes.c_void_p(handle), IOCTL_STORAGE_GET_DEVICE_NUMBER, None, 0,
+                                    ctypes.byref(number), ctypes.sizeof(number), ctypes.byref(returned), None):
+            disk_number = number.DeviceNumber
+        query = _STORAGE_PROPERTY_QUERY(StorageDeviceSeekPenaltyProperty, 0)
+        penalty = _DEVICE_SEEK_PENALTY_DESCRIPTOR()
+        if kernel32.DeviceIoControl(ctypes.c_void_p(handle), IOCTL_STORAGE_QUERY_PROPERTY,
+                                    ctypes.byref(query), ctypes.sizeof(query),
+                                    ctypes.byref(penalty), ctypes.sizeof(penalty), ctypes.byref(returned), None):
+            seek_penalty = bool(penalty.IncursSeekPenalty)
+    finally:
+        kernel32.CloseHandle(ctypes.c_void_p(handle))
+    return disk_number, seek_penalty
+
+def device_info(drive):
+    """
+    Restituisce (chiave del dispositivo, rotazionale) per il volume.
+    Volumi con la stessa chiave stanno sullo stesso disco fisico (o, se non
+    si riesce a saperlo, hanno lo stesso st_dev); rotazionale è True per i
+    dischi meccanici, False per gli SSD, None se non si sa.
+    """
+    try:
+        st_dev = os.stat(drive).st_dev
+    except OSError:
+        return None, None
+    if os.name == "nt":
+        disk_number, seek_penalty = _windows_disk_info(drive)
+        key = f"disk{disk_number}" if disk_number is not None else f"dev{st_dev}"
+        return key, seek_penalty
+    block = _linux_block_device(drive)
+    if block is None:
+        return f"dev{st_dev}", None
+    return os.path.basename(block), _read_sys_flag(os.path.join(block, "queue", "rotational"))
+
+def drive_type(drive):
+    """
+    Restituisce il tipo di volume: "fixed", "removable", "network", "cdrom" o "unknown".
+    """
+    if os.name != "nt":
+        device, fstype = _linux_mounts().get(drive.rstrip("/") or "/", ("", ""))
+        if fstype in NETWORK_FILESYSTEMS:
+            return "network"
+        if fstype in OPTICAL_FILESYSTEMS:
+            return "cdrom"
+        block = _linux_block_device(drive)
+        if block is not None and _read_sys_flag(os.path.join(block, "removable")):
+            return "removable"
+        return "fixed"
+    try:
+        kind = ctypes.windll.kernel32.GetDriveTypeW(drive)
+    except Exception:
+        return "unknown"
+    # DRIVE_REMOVABLE, DRIVE_FIXED, DRIVE_REMOTE, DRIVE_CDROM, DRIVE_RAMDISK
+    return {2: "removable", 3: "fixed", 4: "network", 5: "cdrom", 6: "fixed"}.get(kind, "unknown")
+
+def workers_for_device(rotational, kind):
+    if kind == "network":
+        return UNKNOWN_DEVICE_WORKERS
+    if rotational is True:
+        return HDD_WORKERS
+    if rotational is False:
+        return SSD_WORKERS
+    return UNKNOWN_DEVICE_WORKERS
+
+# ------------------------------------------------------------
+#            INDICE PERSISTENTE DELLE INSTALLAZIONI
+# ------------------------------------------------------------
+class DiscoveryIndex:
+    """
+    Indice su disco delle cartelle di gioco trovate (quelle con Data.p4k)
+    e dello stato dei volumi già scansionati.
+
+    Per ogni drive viene salvata la firma del volume al momento della
+    scansione: se la firma non cambia il drive non viene riscansionato,
+    sia che contenga installazioni sia che sia marcato come vuoto.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.data = self._load()
+
+    def _empty(self):
+        return {"version": INDEX_VERSION, "updated_at": 0, "roots": {}, "volumes": {}}
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return self._empty()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[DEBUG] Indice installazioni illeggibile ({e}), lo ricreo.")
+            return self._empty()
+        if data.get("version") != INDEX_VERSION:
+            return self._empty()
+        data.setdefault("roots", {})
+        data.setdefault("volumes", {})
+        return data
+
+    def save(self):
+        if not self.path:
+            return
+        self.data["updated_at"] = time.time()
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print("[DEBUG] Errore salvando l'indice installazioni:", e)
+
+    def cached_installations(self):
+        """
+        Verifica le cartelle memorizzate con una stat su Data.p4k ciascuna
+        e restituisce quelle ancora valide come lista di (nome, percorso).
+        Le cartelle che non esistono più vengono tolte dall'indice.
+        """
+        folders = []
+        for root, info in list(self.data["roots"].items()):
+            if os.path.isfile(os.path.join(root, GAME_ARCHIVE)):
+                folders.append((info["name"], root))
+            else:
+                del self.data["roots"][root]
+        return folders
+
+    def is_expired(self):
+        return time.time() - self.data.get("updated_at", 0) > INDEX_MAX_AGE
+
+    def stale_drives(self, drives):
+        """
+        Restituisce i drive da riscansionare: quelli mai visti, quelli la cui
+        firma è cambiata e, se l'indice è scaduto, tutti quelli presenti.
+        """
+        expired = self.is_expired()
+        stale = []
+        for drive in drives:
+            signature = volume_signature(drive)
+            known = self.data["volumes"].get(drive)
+            if signature is None:
+                # Drive assente: le eventuali installazioni non sono raggiungibili
+                if known is not None:
+                    del self.data["volumes"][drive]
+                continue
+            if (expired or known is None or known.get("pending")
+                    or (known["volume_id"], known["signature"]) != signature):
+                stale.append(drive)
+        return stale
+
+    def pending_for(self, drive):
+        """
+        Restituisce le cartelle ancora da visitare di una scansione parziale
+        del drive, oppure None se non c'è nulla da riprendere.
+        """
+        known = self.data["volumes"].get(drive)
+        if not known or not known.get("pending"):
+            return None
+        try:
+            if os.stat(drive).st_dev != known["volume_id"]:
+                return None
+        except OSError:
+            return None
+        return [tuple(item) for item in known["pending"]]
+
+    def expected_dirs(self, drives):
+        """
+        Restituisce quante cartelle sono state visitate sui drive indicati
+        nell'ultima scansione, oppure None se manca il dato per qualche drive.
+        """
+        total = 0
+        for drive in drives:
+            dirs = self.data["volumes"].get(drive, {}).get("dirs_visited")
+            if not dirs:
+                return None
+            total += dirs
+        return total
+
+    def record_drive(self, drive, folders, dirs_visited=None, pending=None, resumed=False):
+        """
+        Sostituisce le installazioni note del drive con quelle appena trovate
+        e ne memorizza la firma (un drive senza risultati resta marcato come vuoto).
+        dirs_visited serve a stimare l'avanzamento della scansione successiva.
+        pending sono le cartelle non visitate di una scansione interrotta, da
+        cui ripartire la volta dopo; con resumed i risultati si aggiungono a
+        quelli della parte di scansione precedente invece di sostituirli.
+        """
+        previous = self.data["volumes"].get(drive, {})
+        if resumed:
+            dirs_visited = (dirs_visited or 0) + (previous.get("dirs_visited") or 0)
+        else:
+            for root, info in list(self.data["roots"].items()):
+                if info.get("drive") == drive:
+                    del self.data["roots"][root]
+        for folder_name, folder_path in folders:
+            self.data["roots"][folder_path] = {"name": folder_name, "drive": drive}
+        signature = volume_signature(drive)
+        if signature is None:
+            self.data["volumes"].pop(drive, None)
+            return
+        if pending and len(pending) > MAX_PENDING_DIRS:
+            pending = None
+            # Troppo da ricordare: la prossima volta il drive viene riscansionato da capo
+            signature = (signature[0], "")
+        self.data["volumes"][drive] = {
+            "volume_id": signature[0],
+            "signature": signature[1],
+            "empty": not any(info.get("drive") == drive for info in self.data["roots"].values()),
+            "scanned_at": time.time(),
+            "dirs_visited": dirs_visited,
+            "pending": [list(item) for item in pending] if pending else None,
+        }
+
+# ------------------------------------------------------------
+#                 RICERCA SUI DRIVE
+# ------------------------------------------------------------
+class TreeWalker:
+    """
+    Crawler basato su os.scandir che cerca le cartelle con Data.p4k.
+
+    Rispetto a os.walk non costruisce le liste dei file, salta le cartelle
+    della lista prune, non segue symlink/junction, limita la profondità e
+    sotto una cartella "StarCitizen" scende solo di shape_depth livelli
+    (la forma attesa è Roberts Space Industries/StarCitizen/<CANALE>).
+    Quando trova un Data.p4k non scende oltre: le installazioni non si annidano.
+    skip_paths sono cartelle da non attraversare (ad esempio altri volumi
+    montati dentro quello scansionato).
+    """
+    def __init__(self, prune_names=None, prune_prefixes=DEFAULT_PRUNE_PREFIXES,
+                 max_depth=DEFAULT_MAX_DEPTH, shape_depth=DEFAULT_SHAPE_DEPTH, skip_paths=()):
+        if prune_names is None:
+            prune_names = DEFAULT_PRUNE_NAMES
+        self.prune_names = {name.lower() for name in prune_names}
+        self.prune_prefixes = tuple(prune_prefixes)
+        self.max_depth = max_depth
+        self.shape_depth = shape_depth
+        self.skip_paths = {os.path.normcase(os.path.normpath(p)) for p in skip_paths}
+        self.dirs_visited = 0
+        self.pending = []
+
+    def is_pruned(self, name):
+        lowered = name.lower()
+        return lowered in self.prune_names or lowered.startswith(self.prune_prefixes)
+
+    def visit(self, item):
+        """
+        Visita una sola cartella. item è (percorso, profondità, profondità della
+        cartella "StarCitizen" o None). Restituisce (installazione o None,
+        sottocartelle da visitare): le sottocartelle promettenti sono in fondo
+        alla lista, così chi usa una pila le visita per prime.
+        """
+        path, depth, shape = item
+        has_archive = False
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.name == GAME_ARCHIVE:
+                            has_archive = has_archive or entry.is_file()
+                        elif entry.is_dir(follow_symlinks=False) and not entry.is_symlink():
+                            if getattr(entry, "is_junction", None) and entry.is_junction():
+                                continue
+                            if not self.is_pruned(entry.name):
+                                subdirs.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            return None, []
+        if has_archive and 'StarCitizen' in path:
+            return (os.path.basename(path), path), []
+        if depth >= self.max_depth:
+            return None, []
+        children = []
+        hinted = []
+        for name in subdirs:
+            child_shape = shape
+            if child_shape is None and 'StarCitizen' in name:
+                child_shape = depth + 1
+            if child_shape is not None and depth + 1 - child_shape > self.shape_depth:
+                continue
+            child_path = os.path.join(path, name)
+            if self.skip_paths and os.path.normcase(child_path) in self.skip_paths:
+                continue
+            item = (child_path, depth + 1, child_shape)
+            if name.lower() in HINT_NAMES or child_shape is not None:
+                hinted.append(item)
+            else:
+                children.append(item)
+        return None, children + hinted
+
+    def walk(self, top, should_stop=None, resume=None):
+        """
+        Generatore che restituisce (nome, percorso) per ogni installazione trovata sotto top.
+        should_stop viene chiamata prima di ogni cartella: se restituisce True la
+        visita si ferma e le cartelle non ancora visitate restano in self.pending,
+        da passare come resume per riprendere da lì.
+        """
+        stack = list(resume) if resume else [(top, 0, None)]
+        self.pending = []
+        while stack:
+            if should_stop is not None and should_stop():
+                self.pending = stack
+                return
+            self.dirs_visited += 1
+            found, children = self.visit(stack.pop())
+            if found:
+                yield found
+            stack.extend(children)
+
+class DeviceScan:
+    """
+    Scansione parallela dei volumi che stanno sullo stesso dispositivo fisico.
+
+    Tutte le cartelle da visitare dei volumi del dispositivo finiscono in una
+    pila condivisa da cui ogni worker prende il lavoro: quando un volume
+    piccolo finisce, i suoi worker continuano ad aiutare su quello grande.
+    Il numero di worker dipende dal dispositivo (vedi workers_for_device).
+    Gli eventi ("found", drive, installazione) e ("done", drive, installazioni)
+    vengono messi nella coda events.
+    """
+    def __init__(self, drives, workers, walker, events, should_stop, resumes=None):
+        self.drives = drives
+        self.workers = max(1, workers)
+        self.walker = walker
+        self.events = events
+        self.should_stop = should_stop
+        self.cond = threading.Condition()
+        self.stack = []
+        self.busy = 0
+        self.outstanding = {}
+        self.dirs_visited = {}
+        self.pending = {}
+        self.folders = {}
+        resumes = resumes or {}
+        for drive in drives:
+            items = resumes.get(drive) or [(drive, 0, None)]
+            self.outstanding[drive] = len(items)
+            self.dirs_visited[drive] = 0
+            self.pending[drive] = []
+            self.folders[drive] = []
+            self.stack.extend((drive, item) for item in items)
+
+    def start(self):
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                while not self.stack and self.busy:
+                    self.cond.wait()
+                if not self.stack:
+                    self.cond.notify_all()
+                    return
+                drive, item = self.stack.pop()
+                self.busy += 1
+            stopped = self.should_stop(drive)
+            found, children = (None, []) if stopped else self.walker.visit(item)
+            if found:
+                self.folders[drive].append(found)
+                self.events.put(("found", drive, found))
+            with self.cond:
+                self.busy -= 1
+                if stopped:
+                    self.pending[drive].append(item)
+                else:
+                    self.dirs_visited[drive] += 1
+                    self.outstanding[drive] += len(children)
+                    self.stack.extend((drive, child) for child in children)
+                self.outstanding[drive] -= 1
+                if self.outstanding[drive] == 0:
+                    self.events.put(("done", drive, self.folders[drive]))
+                self.cond.notify_all()
+
+# ------------------------------------------------------------
+#        PERCORSI NOTI (PRIMA DELLA SCANSIONE COMPLETA)
+# ------------------------------------------------------------
+def get_launcher_dir():
+    appdata = os.getenv("APPDATA")
+    return os.path.join(appdata, "rsilauncher") if appdata else None
+
+def launcher_library_paths(launcher_dir):
+    """
+    Estrae dai file di configurazione e dai log del launcher RSI i percorsi
+    delle cartelle di libreria (Roberts Space Industries o StarCitizen, più
+    il canale se indicato) che vi compaiono.
+    I percorsi più recenti nei log vengono restituiti per primi.
+    """
+    if not launcher_dir or not os.path.isdir(launcher_dir):
+        return []
+    paths = []
+    for pattern in LAUNCHER_FILE_PATTERNS:
+        for file_path in glob.glob(os.path.join(launcher_dir, pattern)):
+            try:
+                with open(file_path, "rb") as f:
+                    size = f.seek(0, os.SEEK_END)
+                    f.seek(max(0, size - LAUNCHER_READ_LIMIT))
+                    text = f.read().decode("utf-8", "replace")
+            except OSError:
+                continue
+            # Nei JSON le barre rovesciate sono raddoppiate
+            text = text.replace("\\\\", "\\")
+            for match in reversed(list(LAUNCHER_PATH_RE.finditer(text))):
+                base, channel = match.group(1), match.group(2)
+                if channel:
+                    paths.append(os.path.join(base, channel))
+                paths.append(base)
+    return paths
+
+def known_location_candidates(drives, last_selected_folder=None, launcher_dir=None):
+    """
+    Restituisce la lista ordinata delle cartelle da controllare prima della
+    scansione completa: l'ultima cartella scelta, le librerie del launcher RSI
+    e i percorsi predefiniti su ogni drive.
+    """
+    candidates = []
+    if last_selected_folder:
+        candidates.append(last_selected_folder)
+    candidates.extend(launcher_library_paths(launcher_dir))
+    for drive in drives:
+        for install_dir in DEFAULT_INSTALL_DIRS:
+            candidates.append(os.path.join(drive, install_dir))
+    unique = []
+    seen = set()
+    for candidate in candidates:
+        key = os.path.normcase(os.path.normpath(candidate))
+        if key not in seen:
+            seen.add(key)
+            unique.append(candidate)
+    return unique
+
+def probe_location(path):
+    """
+    Controlla una cartella candidata: se contiene Data.p4k è un'installazione,
+    altrimenti vengono controllate le sottocartelle dirette (i canali) e, se
+    presente, la sottocartella StarCitizen. Restituisce una lista di (nome, percorso).
+    """
+    if os.path.isfile(os.path.join(path, GAME_ARCHIVE)):
+        return [(os.path.basename(os.path.normpath(path)), os.path.normpath(path))]
+    folders = []
+    try:
+        with os.scandir(path) as it:
+            children = [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return folders
+    for child in children:
+        if os.path.isfile(os.path.join(child, GAME_ARCHIVE)):
+            folders.append((os.path.basename(child), child))
+        elif os.path.basename(child).lower() == "starcitizen":
+            folders.extend(probe_location(child))
+    return folders
+
+def probe_known_locations(drives, last_selected_folder=None, launcher_dir=None):
+    """
+    Percorso veloce: controlla solo le posizioni note e restituisce le installazioni trovate.
+    """
+    found = []
+    seen = set()
+    for candidate in known_location_candidates(drives, last_selected_folder, launcher_dir):
+        for folder_name, folder_path in probe_location(candidate):
+            key = os.path.normcase(folder_path)
+            if key not in seen:
+                seen.add(key)
+                found.append((folder_name, folder_path))
+    print("[DEBUG] Installazioni trovate nei percorsi noti:", found)
+    return found
+
+def scan_installations(drives=None, index=None, force_rescan=False, last_selected_folder=None,
+                       launcher_dir=None, poll_interval=0.2, cancel_event=None,
+                       drive_budget=DEFAULT_DRIVE_BUDGET, total_budget=DEFAULT_TOTAL_BUDGET):
+    """
+    Generatore che cerca le installazioni di Star Citizen e restituisce gli
+    eventi man mano che avvengono:
+      ("found", (nome, percorso))  appena un'installazione viene trovata
+      ("progress", stato)          almeno ogni poll_interval secondi durante la scansione
+      ("done", riepilogo)          alla fine, anche se la ricerca è stata interrotta
+    stato è un dict con dirs_visited, drives_done, drives_total, percent ed
+    eta (secondi rimanenti stimati, None se non stimabili); riepilogo è un
+    dict con cancelled, partial (drive scansionati solo in parte) e skipped
+    (drive non scansionati).
+
+    Prima vengono controllati i percorsi noti e le cartelle memorizzate
+    nell'indice e le installazioni trovate vengono restituite subito. Se
+    hanno trovato qualcosa si scansionano poi solo i drive che l'indice
+    considera da aggiornare (cambiati dall'ultima ricerca, o tutti se
+    l'indice è scaduto) e, se non ce ne sono, la ricerca finisce lì; senza
+    indice la ricerca finisce lì. Con force_rescan (ricerca completa) si
+    scansionano tutti i drive. Le scansioni parziali riprendono da dove si
+    erano fermate e nessuna installazione viene restituita due volte.
+
+    Se drives non è indicato i volumi vengono chiesti al sistema operativo.
+    I volumi sullo stesso disco fisico condividono una pila di cartelle da
+    visitare, con più worker sugli SSD e uno solo sui dischi meccanici.
+
+    La ricerca si ferma quando cancel_event viene impostato o quando scade
+    total_budget; ogni drive ha al massimo drive_budget secondi. I drive di
+    rete e i lettori ottici vengono saltati, quelli rimovibili scansionati
+    per ultimi e solo se sui dischi fissi non è stato trovato nulla
+    (con force_rescan vengono scansionati tutti).
+    """
+    print("[DEBUG] scan_installations() avviato.")
+    drives = drives or list_volumes()
+    if launcher_dir is None:
+        launcher_dir = get_launcher_dir()
+    start = time.monotonic()
+    deadline = start + total_budget if total_budget else None
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    summary = {"cancelled": False, "partial": [], "skipped": []}
+    # Installazioni già restituite (percorsi normalizzati)
+    reported = set()
+    stale = None
+    if not force_rescan:
+        found = probe_known_locations(drives, last_selected_folder, launcher_dir)
+        if index is not None:
+            seen = {os.path.normcase(path) for _, path in found}
+            found.extend(f for f in index.cached_installations() if os.path.normcase(f[1]) not in seen)
+        if found:
+            print("[DEBUG] Cartelle StarCitizen trovate senza scansione:", found)
+            for folder in found:
+                reported.add(os.path.normcase(folder[1]))
+                yield "found", folder
+            stale = index.stale_drives(drives) if index is not None else []
+            if not stale:
+                yield "progress", {"dirs_visited": 0, "drives_done": 0, "drives_total": 0, "percent": 100, "eta": 0}
+                yield "done", summary
+                return
+            print("[DEBUG] Indice da aggiornare, riscansiono i drive:", stale)
+    if index is None:
+        to_scan = drives
+    elif force_rescan:
+        to_scan = [d for d in drives if volume_signature(d) is not None]
+    else:
+        to_scan = stale if stale is not None else index.stale_drives(drives)
+    print("[DEBUG] Drive da scansionare:", to_scan)
+    if index is not None:
+        for name, path in index.cached_installations():
+            if index.data["roots"][path].get("drive") not in to_scan and os.path.normcase(path) not in reported:
+                reported.add(os.path.normcase(path))
+                yield "found", (name, path)
+
+    types = {drive: drive_type(drive) for drive in to_scan}
+    if not force_rescan:
+        summary["skipped"] = [d for d in to_scan if types[d] in SKIPPED_DRIVE_TYPES]
+    fixed = [d for d in to_scan if d not in summary["skipped"] and types[d] != "removable"]
+    removable = [d for d in to_scan if d not in summary["skipped"] and types[d] == "removable"]
+
+    scanned = fixed + removable
+    # Non si entra negli altri volumi montati dentro quello scansionato (su Linux anche /proc, /sys, ...)
+    walker = TreeWalker(skip_paths=list(drives) + (list(_linux_mounts()) if os.name != "nt" else []))
+    scans = []
+    expected = index.expected_dirs(scanned) if index is not None else None
+    events = queue.Queue()
+    drives_done = 0
+    found_count = len(reported)
+
+    def progress():
+        visited = sum(sum(scan.dirs_visited.values()) for scan in scans)
+        if not scanned:
+            percent = 100
+        elif expected:
+            percent = min(99, visited * 100 // expected)
+        else:
+            percent = drives_done * 100 // len(scanned)
+        elapsed = time.monotonic() - start
+        eta = elapsed * (100 - percent) / percent if percent else None
+        return {"dirs_visited": visited, "drives_done": drives_done, "drives_total": len(scanned),
+                "percent": percent, "eta": eta}
+
+    def run_phase(phase_drives):
+        nonlocal drives_done, found_count
+        if not phase_drives:
+            return
+        phase_start = time.monotonic()
+        limits = {}
+        for drive in phase_drives:
+            candidates = [d for d in (phase_start + drive_budget if drive_budget else None, deadline) if d is not None]
+            limits[drive] = min(candidates) if candidates else None
+
+        def should_stop(drive):
+            return cancelled() or (limits[drive] is not None and time.monotonic() > limits[drive])
+
+        # Un gruppo per dispositivo fisico, con un numero di worker adatto al dispositivo
+        groups = {}
+        for drive in phase_drives:
+            key, rotational = device_info(drive)
+            groups.setdefault(key or drive, {"drives": [], "workers": 0})
+            group = groups[key or drive]
+            group["drives"].append(drive)
+            group["workers"] = max(group["workers"], workers_for_device(rotational, types[drive]))
+        print("[DEBUG] Gruppi di scansione per dispositivo:", groups)
+        resumes = {}
+        for drive in phase_drives:
+            resumes[drive] = index.pending_for(drive) if index is not None and not force_rescan else None
+        drive_scans = {}
+        for group in groups.values():
+            scan = DeviceScan(group["drives"], group["workers"], walker, events, should_stop, resumes)
+            scans.append(scan)
+            for drive in group["drives"]:
+                drive_scans[drive] = scan
+            scan.start()
+        remaining = len(phase_drives)
+        while remaining:
+            try:
+                kind, drive, payload = events.get(timeout=poll_interval)
+            except queue.Empty:
+                yield "progress", progress()
+                continue
+            if kind == "found":
+                found_count += 1
+                if os.path.normcase(payload[1]) not in reported:
+                    reported.add(os.path.normcase(payload[1]))
+                    yield "found", payload
+                continue
+            remaining -= 1
+            drives_done += 1
+            scan = drive_scans[drive]
+            if scan.pending[drive]:
+                summary["partial"].append(drive)
+            if index is not None:
+                index.record_drive(drive, payload, scan.dirs_visited[drive], scan.pending[drive],
+                                   resumed=resumes[drive] is not None)
+            yield "progress", progress()
+
+    yield from run_phase(fixed)
+    if removable and (force_rescan or not found_count) and not cancelled():
+        yield from run_phase(removable)
+    else:
+        summary["skipped"].extend(removable)
+        drives_done += len(removable)
+    if index is not None:
+        index.save()
+    summary["cancelled"] = cancelled()
+    print("[DEBUG] Riepilogo ricerca:", summary)
+    final = progress()
+    final.update(percent=100, eta=0)
+    yield "progress", final
+    yield "done", summary
+
+def find_star_citizen_installations(progress_callback=None, drives=None, index=None, force_rescan=False,
+                                    last_selected_folder=None, launcher_dir=None):
+    """
+    Versione bloccante di scan_installations: restituisce la lista completa
+    delle installazioni (nome, percorso). progress_callback, se indicato,
+    riceve la percentuale di avanzamento.
+    """
+    valid_folders = []
+    for kind, payload in scan_installations(drives, index, force_rescan, last_selected_folder, launcher_dir):
+        if kind == "found":
+            valid_folders.append(payload)
+        elif kind == "progress" and progress_callback is not None:
+            progress_callback(payload["percent"])
+    print("[DEBUG] Cartelle StarCitizen trovate:", valid_folders)
+    return valid_folders
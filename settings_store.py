@@ -0,0 +1,225 @@
+"""
+Impostazioni condivise da installer e updater (settings.json).
+
+Le impostazioni restano in memoria: leggerle non tocca il disco. Le
+modifiche avvisano chi si è registrato con subscribe() e vengono scritte
+poco dopo da un thread separato, raccogliendo in un'unica scrittura quelle
+ravvicinate; il file viene sostituito in modo atomico (vedi
+atomic_files.py), quindi un crash durante il salvataggio non lo corrompe.
+Prima di scrivere il file viene riletto e vengono applicate solo le chiavi
+cambiate, così installer e updater non si cancellano a vicenda le modifiche.
+
+Il file ha un numero di schema (schema_version): all'apertura di un file
+più vecchio vengono applicate in ordine le migrazioni di MIGRATIONS.
+"""
+import os
+import json
+import atexit
+import threading
+
+from atomic_files import atomic_write
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+DEFAULTS = {
+    "start_with_windows": False,
+    "use_dynamic_splash": True,
+    "installed_translation_version": "",
+    "last_selected_folder": "",
+    "payload_cache_max_mb": 64,
+    "splash_min_ms": 1000,
+    "splash_max_wait_ms": 5000,
+    "metadata_ttl_minutes": 60,
+    # Versione dell'installer scaricata dall'updater
+    "installer_version": "0",
+    # Hash e dimensione dell'installer scaricato, per verificarlo a ogni avvio
+    "installer_sha256": None,
+    "installer_size": None,
+    # [nome, dimensione, mtime_ns, sha256] dell'ultimo installer verificato: se il file non cambia non va riletto
+    "installer_verified": None,
+    # "background": l'updater avvia subito l'installer in cache e scarica gli
+    # aggiornamenti per il prossimo avvio; "mandatory": aspetta il controllo e il download
+    "update_policy": "background",
+}
+# Attesa prima di scrivere, per raccogliere le modifiche ravvicinate (secondi)
+WRITE_DELAY = 0.5
+LEGACY_INSTALLER_VERSION_FILE = "installer_version.json"
+
+# ------------------------------------------------------------
+#                 MIGRAZIONI
+# ------------------------------------------------------------
+def _migrate_to_v1(data, folder):
+    # settings.json senza schema_version, scritto dalle versioni precedenti: stesse chiavi
+    return data
+
+def _migrate_to_v2(data, folder):
+    # La versione dell'installer era in installer_version.json, scritto dall'updater
+    legacy_path = os.path.join(folder, LEGACY_INSTALLER_VERSION_FILE)
+    try:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            data["installer_version"] = str(json.load(f).get("version", "0"))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[DEBUG] {LEGACY_INSTALLER_VERSION_FILE} illeggibile, lo ignoro:", e)
+    return data
+
+# MIGRATIONS[n] porta un file dallo schema n allo schema n + 1
+MIGRATIONS = [_migrate_to_v1, _migrate_to_v2]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+class SettingsStore:
+    """
+    Impostazioni in memoria con salvataggio differito. Si legge con
+    get()/[] e si scrive con set()/update(); flush() scrive subito ciò che
+    è in sospeso (viene chiamato anche all'uscita del processo).
+    """
+    def __init__(self, path, defaults=DEFAULTS, delay=WRITE_DELAY):
+        self.path = path
+        self.folder = os.path.dirname(path)
+        self.defaults = dict(defaults)
+        self.delay = delay
+        self.lock = threading.Lock()
+        # Serializza le scritture: il timer e flush() possono scrivere insieme
+        self.write_lock = threading.Lock()
+        self.subscribers = []
+        self.dirty = set()
+        self.timer = None
+        stored, migrated = self._read()
+        self.data = dict(self.defaults, **stored)
+        # Un file migrato viene riscritto subito (in background); i file vecchi si
+        # eliminano solo dopo. Senza file e senza file vecchi non c'è nulla da scrivere.
+        self.migrated = migrated and bool(stored)
+        if self.migrated:
+            self.dirty.update(stored)
+            with self.lock:
+                self._schedule()
+        atexit.register(self.flush)
+
+    # --------------------------------------------------------
+    #             LETTURA E MIGRAZIONE
+    # --------------------------------------------------------
+    def _read(self):
+        """
+        Legge il file e lo porta allo schema attuale.
+        Restituisce (impostazioni, True se sono state applicate migrazioni).
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("il contenuto non è un oggetto JSON")
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            # Con le scritture atomiche non dovrebbe succedere: si tiene una copia per capire cos'è successo
+            print(f"[DEBUG] {self.path} illeggibile ({e}), lo salvo come .corrupt e uso i default.")
+            try:
+                os.replace(self.path, self.path + ".corrupt")
+            except OSError:
+                pass
+            data = {}
+        version = data.pop("schema_version", 0)
+        migrated = False
+        for migration in MIGRATIONS[version:]:
+            data = migration(data, self.folder)
+            migrated = True
+        return data, migrated
+
+    def _remove_legacy_files(self):
+        legacy_path = os.path.join(self.folder, LEGACY_INSTALLER_VERSION_FILE)
+        if os.path.exists(legacy_path):
+            try:
+                os.remove(legacy_path)
+                print(f"[DEBUG] {LEGACY_INSTALLER_VERSION_FILE} migrato in {os.path.basename(self.path)}.")
+            except OSError as e:
+                print(f"[DEBUG] Impossibile eliminare {legacy_path}:", e)
+
+    # --------------------------------------------------------
+    #             ACCESSO
+    # --------------------------------------------------------
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        with self.lock:
+            return self.data[key]
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.data)
+
+    def subscribe(self, callback):
+        """
+        callback(chiave, valore) viene chiamato, nel thread che fa la
+        modifica, per ogni impostazione che cambia valore.
+        """
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        """
+        Cambia le impostazioni indicate e programma il salvataggio.
+        Le chiavi il cui valore non cambia vengono ignorate.
+        """
+        changed = {}
+        with self.lock:
+            for key, value in values.items():
+                if self.data.get(key) != value:
+                    self.data[key] = value
+                    self.dirty.add(key)
+                    changed[key] = value
+            if changed:
+                self._schedule()
+        for key, value in changed.items():
+            print(f"[DEBUG] Impostazione {key} = {value!r}")
+            for callback in list(self.subscribers):
+                callback(key, value)
+
+    # --------------------------------------------------------
+    #             SCRITTURA
+    # --------------------------------------------------------
+    def _schedule(self):
+        # Da chiamare con self.lock: un solo timer per tutte le modifiche ravvicinate
+        if self.timer is None:
+            self.timer = threading.Timer(self.delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """
+        Scrive subito le modifiche in sospeso. Il file viene riletto e
+        vengono applicate solo le chiavi cambiate da questo processo.
+        """
+        with self.write_lock:
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                if not self.dirty:
+                    return
+                changes = {key: self.data[key] for key in self.dirty}
+                self.dirty.clear()
+            stored, _ = self._read()
+            stored.update(changes)
+            stored["schema_version"] = SCHEMA_VERSION
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                atomic_write(self.path, json.dumps(stored, ensure_ascii=False, indent=4))
+            except Exception as e:
+                print(f"[DEBUG] Errore salvando {self.path}:", e)
+                with self.lock:
+                    # Ritenta alla prossima modifica o a flush()
+                    self.dirty.update(changes)
+                return
+            if self.migrated:
+                self.migrated = False
+                self._remove_legacy_files()
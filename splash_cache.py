@@ -0,0 +1,135 @@
+"""
+Cache su disco delle immagini dello splash.
+
+Le immagini (lo splash dinamico scaricato e quello statico incluso
+nell'eseguibile) vengono salvate già ridimensionate alla dimensione con
+cui vengono mostrate e in pixel grezzi ARGB32 premoltiplicati: mostrarle
+costa una lettura locale e nessuna decodifica PNG. Per lo splash dinamico
+vengono ricordati i validatori HTTP (ETag/Last-Modified) e l'hash
+dell'originale, così l'aggiornamento in background scarica l'immagine
+solo se è cambiata.
+"""
+import os
+import json
+import hashlib
+import threading
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+
+from atomic_files import atomic_write
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+META_FILENAME = "meta.json"
+PIXEL_FORMAT = QImage.Format_ARGB32_Premultiplied
+
+def prepare_image(image, side):
+    """
+    Ridimensiona l'immagine perché il lato lungo non superi side pixel e la
+    converte nel formato salvato in cache.
+    """
+    if max(image.width(), image.height()) > side:
+        image = image.scaled(side, side, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image.convertToFormat(PIXEL_FORMAT)
+
+class SplashCache:
+    """
+    Cartella con un file di pixel per immagine (<nome>.argb) e meta.json con
+    dimensioni, chiave e validatori di ognuna.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self.meta_path = os.path.join(folder, META_FILENAME)
+        self.meta = self._load_meta()
+        # Lo splash statico viene salvato dal thread della GUI, quello dinamico dal thread di aggiornamento
+        self.lock = threading.Lock()
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[DEBUG] meta.json dello splash illeggibile ({e}), lo ricreo.")
+            return {}
+
+    def _pixels_path(self, name):
+        return os.path.join(self.folder, f"{name}.argb")
+
+    def entry(self, name):
+        return self.meta.get(name, {})
+
+    def load(self, name, key=None, side=None):
+        """
+        Restituisce la QImage salvata, oppure None se manca, è di un'altra
+        versione (key) o di un'altra dimensione (side).
+        """
+        entry = self.entry(name)
+        if not entry or (key is not None and entry.get("key") != key) or (side is not None and entry.get("side") != side):
+            return None
+        try:
+            with open(self._pixels_path(name), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != entry["bytes_per_line"] * entry["height"]:
+            print(f"[DEBUG] Splash {name} in cache danneggiato, lo ignoro.")
+            return None
+        image = QImage(data, entry["width"], entry["height"], entry["bytes_per_line"], PIXEL_FORMAT)
+        # QImage non copia il buffer: copy() lo rende indipendente da data
+        return image.copy()
+
+    def store(self, name, image, side, key=None, **validators):
+        """
+        Salva l'immagine (già passata da prepare_image) con chiave e validatori.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        data = image.constBits().asstring(image.sizeInBytes())
+        with self.lock:
+            atomic_write(self._pixels_path(name), data)
+            self.meta[name] = {
+                "key": key,
+                "side": side,
+                "width": image.width(),
+                "height": image.height(),
+                "bytes_per_line": image.bytesPerLine(),
+                **validators,
+            }
+            atomic_write(self.meta_path, json.dumps(self.meta, ensure_ascii=False, indent=4))
+
+    def refresh(self, name, url, side, get):
+        """
+        Aggiorna l'immagine da url con una richiesta condizionale fatta con
+        get (ad esempio http_client.get). Restituisce la nuova QImage se è
+        cambiata, altrimenti None.
+        """
+        entry = self.entry(name)
+        if entry.get("side") != side or not os.path.exists(self._pixels_path(name)):
+            # L'immagine in cache non è utilizzabile: serve una richiesta completa
+            entry = {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = get(url, headers=headers)
+        if response.status_code == 304:
+            print(f"[DEBUG] Splash {name} invariato (304).")
+            return None
+        response.raise_for_status()
+        data = response.content
+        sha256 = hashlib.sha256(data).hexdigest()
+        if entry.get("sha256") == sha256:
+            print(f"[DEBUG] Splash {name} invariato (stesso hash).")
+            return None
+        image = QImage.fromData(data)
+        if image.isNull():
+            raise ValueError("Immagine dello splash non valida")
+        image = prepare_image(image, side)
+        self.store(name, image, side, etag=response.headers.get("ETag"),
+                   last_modified=response.headers.get("Last-Modified"), sha256=sha256)
+        print(f"[DEBUG] Splash {name} aggiornato in cache ({image.width()}x{image.height()}).")
+        return image
@@ -0,0 +1,92 @@
+"""
+Profilo dei tempi di avvio dell'installer (e delle fasi dell'updater).
+
+Le fasi dell'avvio (import, QApplication, splash, prima finestra) vengono
+sempre registrate con mark(), che costa una chiamata a perf_counter. Con la
+variabile d'ambiente INSTALLER_PROFILE_STARTUP=1, oppure con l'opzione
+--profile-startup, viene registrato anche il tempo di ogni import di primo
+livello (compresi quelli ritardati, come requests alla prima richiesta) e
+report() stampa il riepilogo.
+
+Questo modulo va importato per primo, perché il tempo zero è il suo import.
+"""
+import os
+import sys
+import time
+import builtins
+import threading
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+PROCESS_START = time.perf_counter()
+ENV_VAR = "INSTALLER_PROFILE_STARTUP"
+FLAG = "--profile-startup"
+ENABLED = os.environ.get(ENV_VAR, "") not in ("", "0") or FLAG in sys.argv
+# Import più lenti mostrati nel riepilogo
+IMPORT_REPORT_LIMIT = 15
+
+_phases = []   # (fase, ms dall'avvio)
+_imports = []  # (modulo, durata in ms, ms dall'avvio, thread)
+_reported = 0
+_local = threading.local()
+_original_import = builtins.__import__
+
+def elapsed_ms():
+    """
+    Millisecondi trascorsi dall'avvio del processo (dall'import di questo modulo).
+    """
+    return (time.perf_counter() - PROCESS_START) * 1000
+
+def mark(phase):
+    """
+    Registra la fine di una fase dell'avvio e ne restituisce il tempo dall'avvio.
+    """
+    at = elapsed_ms()
+    _phases.append((phase, at))
+    return at
+
+# ------------------------------------------------------------
+#                 TEMPI DEGLI IMPORT
+# ------------------------------------------------------------
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Solo i moduli non ancora caricati e solo il primo livello: gli import
+    # annidati sono già compresi nel tempo del modulo che li fa
+    if level or name in sys.modules or getattr(_local, "depth", 0):
+        return _original_import(name, globals, locals, fromlist, level)
+    _local.depth = 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.depth = 0
+        _imports.append((name, (time.perf_counter() - start) * 1000, elapsed_ms(),
+                         threading.current_thread().name))
+
+if ENABLED:
+    builtins.__import__ = _profiled_import
+
+# ------------------------------------------------------------
+#                 RIEPILOGO
+# ------------------------------------------------------------
+def report(title="Profilo di avvio", always=False):
+    """
+    Stampa le fasi registrate e gli import avvenuti dall'ultimo riepilogo.
+    Senza profilo attivo non stampa nulla, a meno di always (le fasi costano
+    poco e l'updater le stampa sempre).
+    """
+    global _reported
+    if not ENABLED and not always:
+        return
+    print(f"[PROFILE] {title} ({elapsed_ms():.0f} ms dall'avvio)")
+    previous = 0.0
+    for phase, at in _phases:
+        print(f"[PROFILE]   {phase:<32} {at:8.0f} ms  (+{at - previous:.0f} ms)")
+        previous = at
+    new_imports = _imports[_reported:]
+    _reported = len(_imports)
+    if new_imports:
+        total = sum(duration for _, duration, _, _ in new_imports)
+        print(f"[PROFILE]   Import: {len(new_imports)} moduli, {total:.0f} ms in totale; i più lenti:")
+        for name, duration, at, thread in sorted(new_imports, key=lambda item: -item[1])[:IMPORT_REPORT_LIMIT]:
+            print(f"[PROFILE]     {name:<30} {duration:7.1f} ms  (a {at:.0f} ms, thread {thread})")
@@ -0,0 +1,437 @@
+"""
+Installazione della traduzione italiana in una cartella di Star Citizen.
+
+Qui c'è la logica che non dipende dall'interfaccia grafica: scaricare
+global.ini nella cache locale (vedi payload_cache.py), installarlo nella
+cartella del gioco insieme a user.cfg e ricordare i validatori HTTP
+(ETag/Last-Modified) dell'ultimo download, così una versione già presente
+in cache non viene mai riscaricata. Quando possibile si scarica solo il
+delta rispetto alla versione già presente (vedi ini_delta.py) o una
+variante compressa (vedi compression.py).
+"""
+import os
+import json
+import shutil
+import hashlib
+
+import http_client
+from downloads import download_file
+from ini_delta import DELTA_FORMAT, DeltaError, load_delta, merge_chunks
+from compression import CompressionError, available_encodings, decompress_stream
+from atomic_files import hash_file, atomic_write
+
+# ------------------------------------------------------------
+#                 CONFIGURAZIONE & COSTANTI
+# ------------------------------------------------------------
+TRANSLATION_URL = "https://drive.google.com/uc?export=download&id=1nS6AvSXgctANr-enrFg5XkZVUdY4N5qH"
+# Indice di rilascio di global.ini pubblicato con release_tools.py (delta e
+# varianti compresse): finché non è online (None) si scarica il file completo
+RELEASE_INDEX_URL = None
+LANGUAGE_FOLDER = "italian_(italy)"
+USER_CFG_LINES = ("g_language=italian_(italy)\n", "g_LanguageAudio=english\n")
+CHUNK_SIZE = 64 * 1024
+
+# ------------------------------------------------------------
+#                 PERCORSI E FILE LOCALI
+# ------------------------------------------------------------
+def translation_paths(folder_path):
+    """
+    Restituisce (percorso di global.ini, percorso di user.cfg) per la cartella del gioco.
+    """
+    global_ini = os.path.join(folder_path, "data", "Localization", LANGUAGE_FOLDER, "global.ini")
+    user_cfg = os.path.join(folder_path, "user.cfg")
+    return global_ini, user_cfg
+
+def file_sha256(path):
+    """
+    Restituisce l'hash SHA-256 del file, oppure None se il file non esiste.
+    """
+    try:
+        return hash_file(path).hexdigest()
+    except OSError:
+        return None
+
+def write_user_cfg(folder_path):
+    _, config_path = translation_paths(folder_path)
+    atomic_write(config_path, "".join(USER_CFG_LINES))
+
+def user_cfg_configured(folder_path):
+    """
+    True se user.cfg esiste e contiene tutte le righe che imposta l'installer.
+    """
+    _, config_path = translation_paths(folder_path)
+    try:
+        with open(config_path, "r", encoding="utf-8", errors="replace") as f:
+            lines = {line.strip() for line in f}
+    except OSError:
+        return False
+    return all(line.strip() in lines for line in USER_CFG_LINES)
+
+# ------------------------------------------------------------
+#        STATO DEI DOWNLOAD (VALIDATORI HTTP + HASH)
+# ------------------------------------------------------------
+def load_payload_state(state_file):
+    """
+    Legge il file JSON con lo stato dei download: per ogni URL etag,
+    last_modified, sha256 e size dell'ultimo contenuto scaricato.
+    """
+    if not state_file or not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[DEBUG] Errore leggendo {state_file}: {e}. Riparto da zero.")
+        return {}
+
+def save_payload_state(state_file, state):
+    if not state_file:
+        return
+    tmp_path = state_file + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, state_file)
+    except Exception as e:
+        print("[DEBUG] Errore salvando lo stato dei download:", e)
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+# ------------------------------------------------------------
+#                 INDICE DI RILASCIO
+# ------------------------------------------------------------
+def fetch_release_index(index_url):
+    """
+    Scarica l'indice di rilascio (vedi release_tools.py). Restituisce il dict
+    oppure None se non è raggiungibile o non è valido.
+    """
+    try:
+        response = http_client.get(index_url)
+        response.raise_for_status()
+        index = response.json()
+        if index.get("format") != DELTA_FORMAT or not index.get("target_sha256"):
+            print("[DEBUG] Indice di rilascio non valido, lo ignoro.")
+            return None
+        return index
+    except Exception as e:
+        print("[DEBUG] Indice di rilascio non disponibile:", e)
+        return None
+
+class TransferProgress:
+    """
+    Riporta l'avanzamento di un download sia come percentuale (per la barra)
+    sia in byte trasferiti e byte decompressi, che coincidono se il file non è compresso.
+    """
+    def __init__(self, progress_callback=None, transfer_callback=None):
+        self.progress_callback = progress_callback
+        self.transfer_callback = transfer_callback
+
+    def __call__(self, compressed_bytes, compressed_total, size=None, total=None):
+        if size is None:
+            size, total = compressed_bytes, compressed_total
+        if self.progress_callback and compressed_total:
+            self.progress_callback(min(100, int(compressed_bytes * 100 / compressed_total)))
+        if self.transfer_callback:
+            self.transfer_callback({
+                "compressed_bytes": compressed_bytes,
+                "compressed_total": compressed_total,
+                "bytes": size,
+                "total": total,
+            })
+
+    def finished(self):
+        if self.progress_callback:
+            self.progress_callback(100)
+
+# ------------------------------------------------------------
+#                 AGGIORNAMENTI DIFFERENZIALI
+# ------------------------------------------------------------
+def find_delta_base(cache, entry, folders, deltas):
+    """
+    Cerca una versione di global.ini da cui esiste un delta: prima quella
+    dell'ultimo download in cache, poi quelle installate nelle cartelle.
+    Restituisce (sha256, percorso) oppure (None, None).
+    """
+    if entry.get("sha256") in deltas and cache.has(entry["sha256"]):
+        return entry["sha256"], cache.path_for(entry["sha256"])
+    for folder_path in folders:
+        installed, _ = translation_paths(folder_path)
+        sha256 = file_sha256(installed)
+        if sha256 in deltas:
+            return sha256, installed
+    return None, None
+
+def fetch_delta_payload(cache, index, base_sha256, base_path, progress_callback=None):
+    """
+    Scarica il delta dalla versione base_sha256 alla versione dell'indice e
+    lo applica riga per riga, scrivendo il risultato direttamente nella
+    cache. Restituisce lo sha256 della nuova versione; solleva DeltaError se
+    il risultato non corrisponde.
+    """
+    info = index["deltas"][base_sha256]
+    delta_path = cache.download_path(f"delta-{base_sha256}.json")
+    download_file(info["url"], delta_path, progress_callback=progress_callback,
+                  expected_sha256=info.get("sha256"), expected_size=info.get("size"))
+    try:
+        delta = load_delta(delta_path)
+    finally:
+        os.remove(delta_path)
+    if delta["base_sha256"] != base_sha256 or delta["target_sha256"] != index["target_sha256"]:
+        raise DeltaError("Il delta non corrisponde alle versioni dell'indice")
+    sha256 = cache.add_stream(merge_chunks(base_path, delta), source=info["url"])
+    if sha256 != delta["target_sha256"]:
+        raise DeltaError(f"Il delta ha prodotto {sha256} invece di {delta['target_sha256']}")
+    return sha256
+
+# ------------------------------------------------------------
+#                 VARIANTI COMPRESSE
+# ------------------------------------------------------------
+def pick_encoding(index):
+    """
+    La variante compressa migliore tra quelle dell'indice che sappiamo leggere, oppure None.
+    """
+    files = index.get("files", {})
+    for encoding in available_encodings():
+        if encoding in files:
+            return encoding
+    return None
+
+def fetch_compressed_payload(cache, index, encoding, progress=None):
+    """
+    Scarica la variante compressa e la decomprime mentre arriva,
+    direttamente nella cache. Verifica l'hash del file compresso e di quello
+    decompresso; restituisce lo sha256 della nuova versione.
+    """
+    info = index["files"][encoding]
+    compressed_digest = hashlib.sha256()
+
+    def on_progress(read, written):
+        if progress:
+            progress(read, info.get("size"), written, index.get("target_size"))
+
+    headers = {"Accept-Encoding": "identity"}
+    with http_client.get(info["url"], headers=headers, stream=True) as response:
+        response.raise_for_status()
+
+        def compressed_chunks():
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    compressed_digest.update(chunk)
+                    yield chunk
+
+        sha256 = cache.add_stream(decompress_stream(compressed_chunks(), encoding, on_progress), source=info["url"])
+    if info.get("sha256") and compressed_digest.hexdigest() != info["sha256"]:
+        raise CompressionError(f"Hash del file {encoding} errato")
+    if sha256 != index["target_sha256"]:
+        raise CompressionError(f"La variante {encoding} ha prodotto {sha256} invece di {index['target_sha256']}")
+    return sha256
+
+# ------------------------------------------------------------
+#                 DOWNLOAD E INSTALLAZIONE
+# ------------------------------------------------------------
+def fetch_from_index(cache, index, entry, base_folders, progress):
+    """
+    Prova ad aggiornare la cache usando l'indice di rilascio: prima con un
+    delta, poi con la variante compressa. Restituisce lo sha256 ottenuto o
+    None se bisogna scaricare il file completo.
+    """
+    target = index["target_sha256"]
+    base_sha256, base_path = find_delta_base(cache, entry, base_folders, index.get("deltas", {}))
+    if base_sha256:
+        print(f"[DEBUG] Aggiornamento differenziale da {base_sha256} a {target}.")
+        try:
+            return fetch_delta_payload(cache, index, base_sha256, base_path, progress)
+        except Exception as e:
+            print("[DEBUG] Delta non applicabile:", e)
+    encoding = pick_encoding(index)
+    if encoding:
+        print(f"[DEBUG] Scarico la variante {encoding} di {target}.")
+        try:
+            return fetch_compressed_payload(cache, index, encoding, progress)
+        except Exception as e:
+            print(f"[DEBUG] Variante {encoding} non utilizzabile:", e)
+    return None
+
+def fetch_payload(cache, state_file=None, progress_callback=None, url=TRANSLATION_URL,
+                  index_url=RELEASE_INDEX_URL, base_folders=(), transfer_callback=None):
+    """
+    Si assicura che l'ultima versione del file all'URL sia nella cache e ne
+    restituisce (sha256, scaricato).
+
+    Se è pubblicato un indice di rilascio viene scaricato, se possibile, solo
+    il delta rispetto a una versione che abbiamo già (in cache o in una delle
+    base_folders), altrimenti la variante compressa; se qualcosa non torna si
+    ripiega sul file completo.
+
+    Se la versione dell'ultimo download è ancora in cache la richiesta è
+    condizionale (If-None-Match/If-Modified-Since): con una risposta 304 non
+    viene scaricato nulla. Altrimenti il file viene scaricato con
+    downloads.download_file (riprendibile, con timeout) e poi spostato nella cache.
+
+    progress_callback riceve la percentuale, transfer_callback un dict con
+    byte trasferiti e decompressi (vedi TransferProgress).
+    """
+    state = load_payload_state(state_file)
+    entry = state.get(url, {})
+    progress = TransferProgress(progress_callback, transfer_callback)
+
+    index = fetch_release_index(index_url) if index_url else None
+    if index:
+        target = index["target_sha256"]
+        if cache.verify(target):
+            print("[DEBUG] L'ultima versione indicata dall'indice è già in cache.")
+            progress.finished()
+            return target, False
+        sha256 = fetch_from_index(cache, index, entry, base_folders, progress)
+        if sha256:
+            progress.finished()
+            # I validatori HTTP appartengono alla versione precedente: non valgono più
+            state[url] = {"etag": None, "last_modified": None, "sha256": sha256,
+                          "size": os.path.getsize(cache.path_for(sha256))}
+            save_payload_state(state_file, state)
+            return sha256, True
+
+    headers = {}
+    if entry.get("sha256") and cache.verify(entry["sha256"]):
+        headers = conditional_headers(entry)
+    print(f"[DEBUG] fetch_payload({url}) - richiesta condizionale: {bool(headers)}")
+
+    download_path = cache.download_path(hashlib.sha1(url.encode("utf-8")).hexdigest())
+    result = download_file(url, download_path, headers, progress)
+    if result["status"] == "not_modified":
+        print("[DEBUG] Il server risponde 304: uso la copia in cache.")
+        progress.finished()
+        return entry["sha256"], False
+
+    sha256 = cache.add_file(download_path, source=url, sha256=result["sha256"])
+    progress.finished()
+    state[url] = {
+        "etag": result["etag"],
+        "last_modified": result["last_modified"],
+        "sha256": sha256,
+        "size": result["size"],
+    }
+    save_payload_state(state_file, state)
+    return sha256, True
+
+def install_payload(folder_path, cache, sha256):
+    """
+    Installa nella cartella del gioco il global.ini con hash sha256 preso
+    dalla cache (se quello presente è già identico non viene toccato) e scrive user.cfg.
+    Restituisce True se global.ini è stato scritto.
+    """
+    save_path, _ = translation_paths(folder_path)
+    written = False
+    if file_sha256(save_path) != sha256:
+        cache.materialize(sha256, save_path)
+        written = True
+    write_user_cfg(folder_path)
+    return written
+
+def install_translation(folder_path, cache, state_file=None, progress_callback=None, url=TRANSLATION_URL):
+    """
+    Installa global.ini e user.cfg nella cartella del gioco passando dalla
+    cache: la rete viene usata solo se la versione online non è già in cache.
+    Restituisce "downloaded" se il file è stato scaricato, "unchanged"
+    altrimenti; in caso di errore solleva DownloadError, l'eccezione di requests o OSError.
+    """
+    sha256, downloaded = fetch_payload(cache, state_file, progress_callback, url, base_folders=[folder_path])
+    install_payload(folder_path, cache, sha256)
+    print("[DEBUG] Download + scrittura configurazione completati con successo!")
+    return "downloaded" if downloaded else "unchanged"
+
+def install_translation_many(folders, cache, state_file=None, progress_callback=None, folder_callback=None,
+                             url=TRANSLATION_URL, max_workers=4, transfer_callback=None):
+    """
+    Installa la traduzione in tutte le cartelle indicate (lista di (nome, percorso))
+    con un solo download: il file viene preso una volta nella cache e poi
+    scritto in parallelo in ogni cartella.
+
+    progress_callback riceve la percentuale del download e transfer_callback
+    i byte trasferiti e decompressi (vedi TransferProgress); folder_callback,
+    se indicato, viene chiamato con (percorso, stato, messaggio) dove stato
+    è "installing", "done" o "error". Restituisce un dict
+    percorso -> (riuscito, messaggio). Se il download fallisce l'eccezione
+    viene sollevata e nessuna cartella viene toccata.
+    """
+    sha256, downloaded = fetch_payload(cache, state_file, progress_callback, url,
+                                       base_folders=[path for _, path in folders],
+                                       transfer_callback=transfer_callback)
+    print(f"[DEBUG] Payload {sha256} pronto (scaricato: {downloaded}), installo in {len(folders)} cartelle.")
+
+    def install_one(folder_path):
+        if folder_callback:
+            folder_callback(folder_path, "installing", "")
+        try:
+            written = install_payload(folder_path, cache, sha256)
+        except Exception as e:
+            print(f"[DEBUG] Errore installando in {folder_path}:", e)
+            if folder_callback:
+                folder_callback(folder_path, "error", str(e))
+            return False, str(e)
+        message = "aggiornata" if written else "già aggiornata"
+        if folder_callback:
+            folder_callback(folder_path, "done", message)
+        return True, message
+
+    import concurrent.futures
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(install_one, path): path for _, path in folders}
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+# ------------------------------------------------------------
+#                 STATO E RIMOZIONE
+# ------------------------------------------------------------
+def latest_payload_sha256(state_file, url=TRANSLATION_URL):
+    """
+    Hash dell'ultima versione scaricata da url secondo lo stato dei download,
+    oppure None se non è mai stata scaricata.
+    """
+    return load_payload_state(state_file).get(url, {}).get("sha256")
+
+def translation_status(folder_path, expected_sha256=None):
+    """
+    Stato della traduzione nella cartella del gioco: se global.ini è
+    presente, il suo hash, se user.cfg è configurato e, se expected_sha256
+    è indicato, se global.ini corrisponde a quella versione (altrimenti None).
+    """
+    global_ini, _ = translation_paths(folder_path)
+    sha256 = file_sha256(global_ini)
+    return {
+        "path": folder_path,
+        "installed": sha256 is not None,
+        "sha256": sha256,
+        "user_cfg": user_cfg_configured(folder_path),
+        "up_to_date": None if expected_sha256 is None else sha256 == expected_sha256,
+    }
+
+def remove_translation(folder_path):
+    """
+    Rimuove user.cfg e la cartella della lingua dalla cartella del gioco;
+    data/Localization e data vengono eliminate solo se restano vuote.
+    Restituisce True se è stato rimosso qualcosa.
+    """
+    _, config_path = translation_paths(folder_path)
+    data_folder = os.path.join(folder_path, "data")
+    localization_folder = os.path.join(data_folder, "Localization")
+    language_folder = os.path.join(localization_folder, LANGUAGE_FOLDER)
+    removed = False
+    if os.path.exists(config_path):
+        os.remove(config_path)
+        removed = True
+    if os.path.isdir(language_folder):
+        shutil.rmtree(language_folder)
+        removed = True
+    for folder in (localization_folder, data_folder):
+        if os.path.isdir(folder) and not os.listdir(folder):
+            os.rmdir(folder)
+    return removed